@@ -1,5 +1,7 @@
 from flask import Flask
 from .models import db
+from .jobs import SearchJobs
+from .store import EventStore
 
 def create_app():
     app = Flask(__name__)
@@ -10,6 +12,10 @@ def create_app():
     with app.app_context():
         db.create_all()
 
+    app.extensions['event_store'] = EventStore(app)
+    app.extensions['search_jobs'] = SearchJobs(app.config.get('SEARCH_JOB_WORKERS', 16),
+                                               app.config.get('SEARCH_JOB_TTL', 600))
+
     from .routes import main
     app.register_blueprint(main)
 
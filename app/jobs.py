@@ -0,0 +1,149 @@
+"""
+Background search jobs.
+
+A search is submitted as a job and the request returns at once; the scrape
+runs on a small thread pool owned by the app, not on the web worker. As each
+source finishes, its events that match the requested date are appended to
+the job, so the results page can poll (or subscribe to) the job and render
+cards as they arrive. When the search completes the job's events are
+replaced by the final, deduplicated and filtered result.
+
+Jobs live in the memory of the process that accepted the search, so every
+poll for a job has to reach that same process. Run the app as a single
+worker process (threads are fine, e.g. gunicorn --workers 1 --threads 8) or
+behind a load balancer with sticky sessions; with several workers a poll can
+land on one that never saw the job and gets a 404.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_type
+from typing import Dict, List, Optional
+
+from utils.records import EventRecord
+from utils.scraper import EventIndex, fetch_events_with_status
+
+logger = logging.getLogger(__name__)
+
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class SearchJob:
+    """One search in flight, with the events found so far."""
+
+    def __init__(self, location: str, date: date_type):
+        self.id = uuid.uuid4().hex
+        self.location = location
+        self.date = date
+        self.status = RUNNING
+        self.events: List[Dict] = []
+        self.sources: List[str] = []
+        self.timed_out: List[str] = []
+        self.match = None
+        self.finished_at = None
+        # Bumped whenever the events list is replaced rather than appended to
+        self.generation = 0
+        self._seen = set()
+        self._changed = threading.Condition()
+
+    def add_source(self, name: str, raw_events: List[Dict]) -> None:
+        """Append one source's events on the requested date, skipping repeats."""
+        # Standardizing rewrites records in place; these are still the source's results
+        events = EventIndex([EventRecord.from_mapping(event) for event in raw_events]).on(self.date)
+        with self._changed:
+            if self.status != RUNNING:
+                # A late callback, e.g. from a background cache refresh
+                return
+            for event in events:
+                key = (event['title'].lower(), event['venue'].lower())
+                if key not in self._seen:
+                    self._seen.add(key)
+                    self.events.append(event)
+            self.sources.append(name)
+            self._changed.notify_all()
+
+    def finish(self, result: Dict) -> None:
+        with self._changed:
+            self.events = result['events']
+            self.timed_out = result['timed_out']
+            self.match = result['match']
+            self.status = DONE
+            self.generation += 1
+            self.finished_at = time.monotonic()
+            self._changed.notify_all()
+
+    def fail(self) -> None:
+        with self._changed:
+            self.status = FAILED
+            self.finished_at = time.monotonic()
+            self._changed.notify_all()
+
+    def wait(self, since: int, generation: int, timeout: float) -> bool:
+        """Block until the job has news for a reader at (since, generation); False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(
+                lambda: self.status != RUNNING or len(self.events) > since or self.generation != generation,
+                timeout=timeout)
+
+    def snapshot(self, since: int = 0, generation: int = 0) -> Dict:
+        """
+        The events a reader hasn't seen yet. If the list was replaced since
+        the reader's generation, every event is returned with 'reset' set.
+        """
+        with self._changed:
+            reset = generation != self.generation
+            start = 0 if reset else min(since, len(self.events))
+            return {
+                'id': self.id,
+                'status': self.status,
+                'events': self.events[start:],
+                'next': len(self.events),
+                'generation': self.generation,
+                'reset': reset,
+                'sources': list(self.sources),
+                'timed_out': list(self.timed_out),
+                'match': self.match,
+            }
+
+
+class SearchJobs:
+    """Runs search jobs on a bounded pool and keeps them around for a while after they finish."""
+
+    def __init__(self, max_workers: int = 16, ttl: float = 600):
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search-job')
+        self._jobs: Dict[str, SearchJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, location: str, date: date_type, store=None) -> SearchJob:
+        job = SearchJob(location, date)
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, store)
+        return job
+
+    def get(self, job_id: str) -> Optional[SearchJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: SearchJob, store) -> None:
+        try:
+            result = fetch_events_with_status(job.location, str(job.date), store=store,
+                                              on_source=job.add_source)
+            job.finish(result)
+            logger.info("Search job %s finished: %d events (%s)", job.id, len(job.events), job.match)
+        except Exception:
+            logger.exception("Search job %s failed", job.id)
+            job.fail()
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and now - job.finished_at > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
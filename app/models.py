@@ -1,18 +1,58 @@
 from flask_sqlalchemy import SQLAlchemy
 
+from utils.records import DATE_NOT_SPECIFIED, EventRecord
+
 db = SQLAlchemy()
 
 class Event(db.Model):
-    __tablename__ = 'events'
+    """A scraped event, keyed by its city and canonical URL."""
+    __tablename__ = 'scraped_events'
+    __table_args__ = (
+        # The same event can be listed under several city spellings
+        db.UniqueConstraint('city', 'url', name='uq_scraped_events_city_url'),
+        db.Index('ix_scraped_events_city_date', 'city', 'event_date'),
+        db.Index('ix_scraped_events_source', 'source'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(200), nullable=False)
-    date = db.Column(db.String(50), nullable=False)
-    location = db.Column(db.String(200), nullable=False)
+    url = db.Column(db.String(1000), nullable=False)
+    title = db.Column(db.String(300), nullable=False)
+    event_date = db.Column(db.Date, nullable=True)
+    city = db.Column(db.String(100), nullable=False)
+    source = db.Column(db.String(50), nullable=False)
+    venue = db.Column(db.String(300), nullable=True)
     description = db.Column(db.Text, nullable=True)
+    image_url = db.Column(db.String(1000), nullable=True)
+    content_hash = db.Column(db.String(64), nullable=False)
+    scraped_at = db.Column(db.DateTime, nullable=False)
+
+    def to_record(self) -> EventRecord:
+        """Return the event as the record the scrapers produce, date already parsed."""
+        return EventRecord(
+            title=self.title,
+            date=self.event_date.isoformat() if self.event_date else DATE_NOT_SPECIFIED,
+            event_date=self.event_date,
+            venue=self.venue or 'Venue not specified',
+            # Events without a real URL are stored under a urn: key
+            url=self.url if self.url.startswith('http') else '#',
+            image_url=self.image_url,
+            description=self.description or '',
+            source=self.source,
+            city=self.city,
+        )
+
+class CityCrawl(db.Model):
+    """When a city was last scraped, so empty results count as fresh too."""
+    __tablename__ = 'city_crawls'
+
+    city = db.Column(db.String(100), primary_key=True)
+    crawled_at = db.Column(db.DateTime, nullable=False)
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+
+class CitySearch(db.Model):
+    """How often a city is searched, used to decide what the crawler pre-warms."""
+    __tablename__ = 'city_searches'
 
-    def __init__(self, name, date, location, description):
-        self.name = name
-        self.date = date
-        self.location = location
-        self.description = description
+    city = db.Column(db.String(100), primary_key=True)
+    search_count = db.Column(db.Integer, nullable=False, default=0)
+    last_searched_at = db.Column(db.DateTime, nullable=False)
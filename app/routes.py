@@ -1,21 +1,62 @@
-from flask import Blueprint, render_template, request
+from flask import (Blueprint, Response, abort, current_app, get_template_attribute, jsonify,
+                   render_template, request, stream_with_context)
 from .forms import EventSearchForm
-from utils.scraper import fetch_events
-from datetime import datetime
+from .jobs import RUNNING
+from utils import health, metrics
+from utils.scraper import SOURCE_TIMEOUT, fetch_events_with_status
+from utils.sources import SOURCES
+from datetime import date as date_type, datetime
+import base64
+import binascii
 import json
+import logging
 
 main = Blueprint('main', __name__)
+logger = logging.getLogger(__name__)
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_KEEPALIVE = 15
+
+# Fields /api/events can return, in output order, and its page sizes
+API_FIELDS = ('title', 'date', 'venue', 'description', 'url', 'image_url', 'source')
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 500
+
+def _no_events_message(location, date, days_in_future):
+    if days_in_future > 30:  # If date is more than a month away
+        return f"No events found in {location} for {date}. The date might be too far ahead - most venues post events 2-4 weeks in advance. Try:"
+    return f"No events found in {location} for {date}. Try:"
+
+def _render_cards(events):
+    if not events:
+        return ''
+    with metrics.timed('render'):
+        event_card = get_template_attribute('_event_card.html', 'event_card')
+        return ''.join(str(event_card(event)) for event in events)
+
+def _job_update(job, since, generation):
+    """A job snapshot for the results page, with the new cards pre-rendered."""
+    update = job.snapshot(since, generation)
+    update['html'] = _render_cards(update.pop('events'))
+    update['message'] = None
+    if update['status'] != RUNNING and not update['next']:
+        days_in_future = (job.date - datetime.now().date()).days
+        update['message'] = _no_events_message(job.location, job.date, days_in_future)
+    return update
 
 @main.route('/', methods=['GET', 'POST'])
 def index():
     form = EventSearchForm()
     if request.method == 'POST':
-        print(f"Form submitted with data: {request.form}")
-        print(f"Form validation errors: {form.errors}")
         if form.validate_on_submit():
             location = form.location.data
             date = form.date.data
-            print(f"Fetching events for location: {location}, date: {date}")
+            logger.info("Fetching events for location: %s, date: %s", location, date)
+            store = current_app.extensions['event_store']
+            try:
+                store.record_search(location)
+            except Exception as e:
+                logger.warning("Error recording search for %s: %s", location, e)
             
             # Check if date is too far in the future
             days_in_future = (date - datetime.now().date()).days
@@ -27,24 +68,182 @@ def index():
                                     events=[],
                                     message=message)
             
-            events = fetch_events(location, str(date))
-            print(f"Received {len(events)} events from fetch_events")
-            print("Events data:")
-            print(json.dumps(events, indent=2))
-            
-            message = None
-            if not events:
-                if days_in_future > 30:  # If date is more than a month away
-                    message = f"No events found in {location} for {date}. The date might be too far ahead - most venues post events 2-4 weeks in advance. Try:"
-                else:
-                    message = f"No events found in {location} for {date}. Try:"
+            # The scrape runs in the background; the page fills in as sources finish
+            job = current_app.extensions['search_jobs'].submit(location, date, store=store)
+            logger.debug("Submitted search job %s", job.id)
             
-            print(f"Rendering template with {len(events)} events")
             return render_template('results.html', 
                                 location=location, 
                                 date=date, 
-                                events=events,
-                                message=message)
+                                events=[],
+                                job_id=job.id)
         else:
-            print(f"Form validation failed: {form.errors}")
+            logger.debug("Form validation failed: %s", form.errors)
     return render_template('index.html', form=form)
+
+@main.route('/search/<job_id>')
+def search_job(job_id):
+    """
+    Poll a search job. Returns the cards added since the 'since' and
+    'generation' the client got from its previous poll.
+    """
+    job = current_app.extensions['search_jobs'].get(job_id)
+    if job is None:
+        abort(404)
+    since = request.args.get('since', 0, type=int)
+    generation = request.args.get('generation', 0, type=int)
+    return jsonify(_job_update(job, since, generation))
+
+@main.route('/search/<job_id>/stream')
+def search_job_stream(job_id):
+    """The same updates as search_job, pushed as Server-Sent Events until the job is done."""
+    job = current_app.extensions['search_jobs'].get(job_id)
+    if job is None:
+        abort(404)
+
+    def stream():
+        since = request.args.get('since', 0, type=int)
+        generation = request.args.get('generation', 0, type=int)
+        while True:
+            if not job.wait(since, generation, timeout=SSE_KEEPALIVE):
+                yield ': keepalive\n\n'
+                continue
+            update = _job_update(job, since, generation)
+            since, generation = update['next'], update['generation']
+            yield f"event: update\ndata: {json.dumps(update)}\n\n"
+            if update['status'] != RUNNING:
+                return
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@main.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@main.route('/health/sources')
+def source_health():
+    """Circuit state, latency and adaptive timeout of every upstream host seen so far."""
+    hosts = health.snapshot(default_timeout=SOURCE_TIMEOUT)
+    for host in hosts:
+        host['sources'] = [spec.name for spec in SOURCES if health.host_of(spec.url_for('')) == host['host']]
+    return jsonify({'hosts': hosts})
+
+class ApiError(ValueError):
+    pass
+
+def _api_date(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ApiError(f"{name} must be a YYYY-MM-DD date")
+
+def _api_limit():
+    value = request.args.get('limit')
+    if not value:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ApiError("limit must be an integer")
+    if not 1 <= limit <= API_MAX_LIMIT:
+        raise ApiError(f"limit must be between 1 and {API_MAX_LIMIT}")
+    return limit
+
+def _sort_key(event):
+    """Keyset order: by date (undated events last), then URL, then title."""
+    event_date = event.get('event_date')
+    return (event_date is None, event_date or date_type.min, event['url'], event['title'])
+
+def _encode_cursor(event):
+    event_date = event.get('event_date')
+    key = [event_date.isoformat() if event_date else None, event['url'], event['title']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii').rstrip('=')
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        day, url, title = json.loads(raw)
+        event_date = datetime.strptime(day, '%Y-%m-%d').date() if day else None
+    except (binascii.Error, ValueError, TypeError):
+        raise ApiError("invalid cursor")
+    if not isinstance(url, str) or not isinstance(title, str):
+        # Compared with real sort keys, other types would raise TypeError
+        raise ApiError("invalid cursor")
+    return (event_date is None, event_date or date_type.min, url, title)
+
+def _api_record(event, fields):
+    record = event.to_dict()
+    record['date'] = record['event_date']
+    return {name: record.get(name) for name in fields}
+
+@main.route('/api/events')
+def api_events():
+    """
+    Events for a city as JSON, one page at a time.
+
+    Query parameters: city (required), date_from and date_to (inclusive,
+    YYYY-MM-DD), source (comma separated), fields (comma separated subset
+    of API_FIELDS), limit, and cursor (the next_cursor of the previous
+    page). Events are ordered by date, then URL. With format=ndjson, or
+    an Accept header of application/x-ndjson, every event from the cursor
+    on is streamed one JSON object per line instead, up to limit if given.
+    """
+    try:
+        city = (request.args.get('city') or '').strip()
+        if not city:
+            raise ApiError("city is required")
+        date_from = _api_date('date_from')
+        date_to = _api_date('date_to')
+        sources = {name.strip() for name in request.args.get('source', '').split(',') if name.strip()}
+        fields = [name.strip() for name in request.args.get('fields', '').split(',') if name.strip()]
+        unknown = [name for name in fields if name not in API_FIELDS]
+        if unknown:
+            raise ApiError(f"unknown fields: {', '.join(unknown)}")
+        fields = fields or list(API_FIELDS)
+        limit = _api_limit()
+        after = _decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ApiError as e:
+        return jsonify({'error': str(e)}), 400
+
+    result = fetch_events_with_status(city, store=current_app.extensions['event_store'])
+    events = []
+    for event in result['events']:
+        event_date = event.get('event_date')
+        if (date_from or date_to) and event_date is None:
+            continue
+        if date_from and event_date < date_from or date_to and event_date > date_to:
+            continue
+        if sources and event.get('source') not in sources:
+            continue
+        key = _sort_key(event)
+        if after is None or key > after:
+            events.append((key, event))
+    events.sort(key=lambda item: item[0])
+    events = [event for _, event in events]
+
+    ndjson = request.args.get('format') == 'ndjson' or \
+        request.accept_mimetypes.best == 'application/x-ndjson'
+    if ndjson:
+        if limit is not None:
+            events = events[:limit]
+
+        def lines():
+            for event in events:
+                yield json.dumps(_api_record(event, fields)) + '\n'
+
+        return Response(lines(), mimetype='application/x-ndjson',
+                        headers={'X-Timed-Out-Sources': ','.join(result['timed_out'])})
+
+    page = events[:limit or API_DEFAULT_LIMIT]
+    has_more = len(events) > len(page)
+    return jsonify({
+        'city': city,
+        'events': [_api_record(event, fields) for event in page],
+        'count': len(page),
+        'next_cursor': _encode_cursor(page[-1]) if has_more else None,
+        'timed_out': result['timed_out'],
+    })
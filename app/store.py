@@ -0,0 +1,177 @@
+"""
+Persistent event store backed by the Event model.
+
+Scraped events are bulk-upserted per city by canonical URL, and a city's
+events can be served straight from the database while its last crawl is
+still fresh.
+"""
+import hashlib
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from utils.records import EventRecord
+
+from .models import db, Event, CityCrawl, CitySearch
+
+# Query parameters that only track the click and don't identify the event
+_TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'ref')
+
+def normalize_city(city: str) -> str:
+    """Normalize a city name for storage and lookup."""
+    return ' '.join(city.lower().split())
+
+def canonical_url(url: str) -> Optional[str]:
+    """Canonicalize an event URL so the same event always maps to one row."""
+    if not url or not url.startswith('http'):
+        return None
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(_TRACKING_PARAMS)]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ''))
+
+def content_hash(event: Dict) -> str:
+    """Hash the fields of an event that are shown to users."""
+    fields = [str(event.get(name) or '') for name in
+              ('title', 'date', 'venue', 'description', 'image_url', 'url')]
+    return hashlib.sha256('\x1f'.join(fields).encode('utf-8')).hexdigest()
+
+def _parse_event_date(value) -> Optional[date]:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+class EventStore:
+    """Read and write scraped events, pushing an app context as needed."""
+
+    def __init__(self, app, max_age: int = None):
+        self.app = app
+        self.max_age = max_age if max_age is not None else app.config.get('EVENT_STORE_MAX_AGE', 3600)
+
+    def _insert(self, model=Event):
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite':
+            return sqlite.insert(model)
+        if dialect == 'postgresql':
+            return postgresql.insert(model)
+        raise NotImplementedError(f"Bulk upsert is not supported on {dialect}")
+
+    def save(self, city: str, events: List[Dict], complete: bool = True,
+             sources: Iterable[str] = None) -> int:
+        """
+        Bulk upsert a city's scraped events by canonical URL. Only rows whose
+        content hash changed are written.
+
+        A complete crawl also marks the city fresh and deletes its stored
+        events from the crawled sources (every source if sources is None)
+        that it didn't find. An incomplete one only adds and updates rows.
+        Returns the number of events in the crawl.
+        """
+        city = normalize_city(city)
+        now = datetime.utcnow()
+        rows = {}
+        for event in events:
+            digest = content_hash(event)
+            venue = event.get('venue')
+            url = canonical_url(event.get('url')) or f"urn:event:{digest}"
+            rows[url] = {
+                'url': url,
+                'title': (event.get('title') or '')[:300],
+                'event_date': event.get('event_date') or _parse_event_date(event.get('date')),
+                'city': city,
+                'source': event.get('source') or 'unknown',
+                'venue': venue[:300] if isinstance(venue, str) else None,
+                'description': event.get('description'),
+                'image_url': event.get('image_url'),
+                'content_hash': digest,
+                'scraped_at': now,
+            }
+
+        with self.app.app_context():
+            query = db.session.query(Event.url, Event.content_hash, Event.source).filter(Event.city == city)
+            stored = {url: (digest, source) for url, digest, source in query}
+            changed = [row for url, row in rows.items() if stored.get(url, (None,))[0] != row['content_hash']]
+            if changed:
+                stmt = self._insert()
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Event.city, Event.url],
+                    set_={name: stmt.excluded[name] for name in
+                          ('title', 'event_date', 'source', 'venue', 'description',
+                           'image_url', 'content_hash', 'scraped_at')},
+                )
+                db.session.execute(stmt, changed)
+            gone = set()
+            if complete:
+                crawled = set(sources) if sources is not None else None
+                gone = {url for url, (_, source) in stored.items()
+                        if url not in rows and (crawled is None or source in crawled)}
+            if gone:
+                (Event.query
+                 .filter(Event.city == city, Event.url.in_(gone))
+                 .delete(synchronize_session=False))
+            if complete:
+                db.session.merge(CityCrawl(city=city, crawled_at=now, event_count=len(rows)))
+            db.session.commit()
+        return len(rows)
+
+    def is_fresh(self, city: str) -> bool:
+        with self.app.app_context():
+            crawl = db.session.get(CityCrawl, normalize_city(city))
+            return crawl is not None and datetime.utcnow() - crawl.crawled_at < timedelta(seconds=self.max_age)
+
+    def load(self, city: str, day: date = None) -> Optional[List[EventRecord]]:
+        """
+        Return a city's stored events if its last crawl is fresh, else None.
+        With a day, only that day's events are read (see events_on), unless
+        there are none; then every event is returned, for a search to fall
+        back on.
+        """
+        if not self.is_fresh(city):
+            return None
+        if day is not None:
+            events = self.events_on(city, day)
+            if events:
+                return events
+        with self.app.app_context():
+            rows = (Event.query
+                    .filter(Event.city == normalize_city(city))
+                    .order_by(Event.event_date, Event.id)
+                    .all())
+            return [row.to_record() for row in rows]
+
+    def events_on(self, city: str, day: date) -> List[EventRecord]:
+        """Return stored events for a city on one date, using the (city, date) index."""
+        with self.app.app_context():
+            rows = (Event.query
+                    .filter(Event.city == normalize_city(city), Event.event_date == day)
+                    .order_by(Event.id)
+                    .all())
+            return [row.to_record() for row in rows]
+
+    def record_search(self, city: str) -> None:
+        """Count a user search for a city."""
+        now = datetime.utcnow()
+        with self.app.app_context():
+            stmt = self._insert(CitySearch).values(
+                city=normalize_city(city), search_count=1, last_searched_at=now)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CitySearch.city],
+                set_={'search_count': CitySearch.search_count + 1, 'last_searched_at': now},
+            )
+            db.session.execute(stmt)
+            db.session.commit()
+
+    def hot_cities(self, limit: int) -> List[Dict]:
+        """Return the most searched cities with their search count and last crawl time."""
+        with self.app.app_context():
+            rows = (db.session.query(CitySearch.city, CitySearch.search_count, CityCrawl.crawled_at)
+                    .outerjoin(CityCrawl, CityCrawl.city == CitySearch.city)
+                    .order_by(CitySearch.search_count.desc())
+                    .limit(limit)
+                    .all())
+            return [{'city': city, 'search_count': count, 'crawled_at': crawled_at}
+                    for city, count, crawled_at in rows]
@@ -0,0 +1,222 @@
+"""
+Crawl many cities in one run and write their events as NDJSON.
+
+    python batch_crawl.py Mumbai Pune Delhi --date-from 2026-11-01 --date-to 2026-11-07 \
+        --output events.ndjson
+
+Cities are crawled concurrently (--workers), and each host gets at most
+--per-host requests at a time. Every city's standardized events are
+appended to the output as soon as that city is done, one JSON object per
+line, so memory stays bounded by the cities in flight.
+
+Each city's search gets --deadline seconds, far longer than the web app's
+interactive deadline: requests queued behind the per-host limit count
+against it, and a batch run would rather wait than give up on a city.
+
+Finished cities are appended to a checkpoint file (by default the output
+path plus ".checkpoint"). Rerunning the same command skips them and appends
+to the existing output, so an interrupted crawl resumes where it stopped.
+A city is checkpointed only after its events are flushed; a crash between
+the two can repeat that one city's events in the output. Cities whose
+sources timed out or failed are neither written nor checkpointed, so the
+next run retries them. Sources skipped because their circuit breaker is
+open are logged and left out; those cities are still written.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, IO, Iterable, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from utils import http_client, parse_pool
+from utils.records import EventRecord
+from utils.scraper import (CRAWL_DEADLINE, EventIndex, MeetupScraper, meetup_event_record, missing_sources,
+                           scrape_location)
+
+logger = logging.getLogger('batch_crawl')
+
+
+def read_cities(cities: List[str], cities_file: Optional[str]) -> List[str]:
+    """Cities from the command line and/or a file with one city per line ('-' for stdin)."""
+    names = list(cities)
+    if cities_file:
+        with (sys.stdin if cities_file == '-' else open(cities_file, encoding='utf-8')) as f:
+            names.extend(line.strip() for line in f)
+    # Drop blanks and case-insensitive repeats, keeping the first spelling in the given order
+    unique = {}
+    for name in names:
+        name = ' '.join(name.split())
+        if name:
+            unique.setdefault(name.lower(), name)
+    return list(unique.values())
+
+
+def read_checkpoint(path: Optional[str]) -> Set[str]:
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as f:
+        return {line.strip().lower() for line in f if line.strip()}
+
+
+def event_record(city: str, event: EventRecord) -> Dict:
+    """A standardized event as one NDJSON line."""
+    record = event.to_dict()
+    return {
+        'city': city,
+        'title': record['title'],
+        'date': record['event_date'],
+        'venue': record['venue'],
+        'description': record['description'],
+        'url': record['url'],
+        'image_url': record['image_url'],
+        'source': record['source'],
+    }
+
+
+class BatchWriter:
+    """Appends a city's events and then its checkpoint line, one city at a time."""
+
+    def __init__(self, output: IO, checkpoint: Optional[IO]):
+        self.output = output
+        self.checkpoint = checkpoint
+        self._lock = threading.Lock()
+
+    def write_city(self, city: str, records: Iterable[Dict]) -> None:
+        lines = ''.join(json.dumps(record) + '\n' for record in records)
+        with self._lock:
+            self.output.write(lines)
+            self.output.flush()
+            if self.checkpoint is not None:
+                self.checkpoint.write(city + '\n')
+                self.checkpoint.flush()
+                os.fsync(self.checkpoint.fileno())
+
+
+def crawl_city(city: str, date_from: Optional[date], date_to: Optional[date],
+               include_meetup: bool = True, deadline: float = CRAWL_DEADLINE) -> Optional[List[Dict]]:
+    """A city's standardized events in the date range, or None if a source timed out or failed."""
+    # Listings are sorted by date, so pagination can stop past the end of the range
+    result = scrape_location(city, until=date_to, deadline=deadline)
+    missing = missing_sources(result)
+    if missing:
+        logger.warning("Sources timed out or failed for %s (%s); will retry on the next run",
+                       city, ', '.join(missing))
+        return None
+    if result['skipped']:
+        logger.warning("Writing %s without unhealthy sources: %s", city, ', '.join(result['skipped']))
+    changes = result['changes']
+    logger.info("%s since the last crawl: %d added, %d changed, %d removed", city,
+                len(changes['added']), len(changes['changed']), len(changes['removed']))
+    events = list(result['events'])
+    if include_meetup:
+        meetup = MeetupScraper().search_events_with_status(city)
+        if not meetup['complete']:
+            logger.warning("Meetup search failed for %s; its Meetup events may be missing", city)
+        events.extend(meetup_event_record(event) for event in meetup['events'])
+
+    index = EventIndex(events)
+    if date_from is None and date_to is None:
+        return index.events
+    return [event for event in index.events
+            if event['event_date'] is not None
+            and (date_from is None or event['event_date'] >= date_from)
+            and (date_to is None or event['event_date'] <= date_to)]
+
+
+def run(cities: List[str], writer: BatchWriter, workers: int, date_from: Optional[date] = None,
+        date_to: Optional[date] = None, include_meetup: bool = True,
+        deadline: float = CRAWL_DEADLINE) -> List[str]:
+    """Crawl the cities with at most `workers` in flight; return the ones that failed."""
+    failed = []
+
+    def work(city):
+        started = time.monotonic()
+        try:
+            events = crawl_city(city, date_from, date_to, include_meetup, deadline)
+        except Exception:
+            logger.exception("Error crawling %s", city)
+            events = None
+        if events is None:
+            failed.append(city)
+            return
+        writer.write_city(city, (event_record(city, event) for event in events))
+        logger.info("Crawled %s: %d events in %.1fs", city, len(events), time.monotonic() - started)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Consume the iterator so worker exceptions surface here
+        list(executor.map(work, cities))
+    return failed
+
+
+def _date(value: str) -> date:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl events for many cities into an NDJSON file.')
+    parser.add_argument('cities', nargs='*', help='cities to crawl')
+    parser.add_argument('--cities-file', help="file with one city per line ('-' for stdin)")
+    parser.add_argument('--date-from', type=_date, help='first event date to keep (YYYY-MM-DD)')
+    parser.add_argument('--date-to', type=_date, help='last event date to keep (YYYY-MM-DD)')
+    parser.add_argument('--output', default='-', help="NDJSON file to append events to ('-' for stdout)")
+    parser.add_argument('--checkpoint', help='file of finished cities (default: OUTPUT.checkpoint)')
+    parser.add_argument('--workers', type=int, default=4, help='cities crawled concurrently')
+    parser.add_argument('--per-host', type=int, default=2, help='concurrent requests allowed per host')
+    parser.add_argument('--deadline', type=float, default=CRAWL_DEADLINE,
+                        help='seconds allowed for one city across all its sources')
+    parser.add_argument('--parse-processes', type=int, default=0,
+                        help='parse listing pages in this many processes (0 parses in-thread)')
+    parser.add_argument('--no-meetup', action='store_true', help='skip the Meetup API')
+    parser.add_argument('--log-level', default='INFO', help='logging level (DEBUG, INFO, WARNING, ...)')
+    args = parser.parse_args()
+
+    # Logs go to stderr, so NDJSON on stdout stays clean
+    logging.basicConfig(level=args.log_level.upper(), stream=sys.stderr,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    if args.date_from and args.date_to and args.date_from > args.date_to:
+        parser.error('--date-from is after --date-to')
+    load_dotenv()
+
+    cities = read_cities(args.cities, args.cities_file)
+    if not cities:
+        parser.error('no cities given')
+    checkpoint_path = args.checkpoint or (args.output + '.checkpoint' if args.output != '-' else None)
+    done = read_checkpoint(checkpoint_path)
+    pending = [city for city in cities if city.lower() not in done]
+    logger.info("%d cities to crawl, %d already done", len(pending), len(cities) - len(pending))
+
+    http_client.set_host_limit(args.per_host)
+    if args.parse_processes:
+        parse_pool.configure(args.parse_processes)
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+    checkpoint = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
+    try:
+        failed = run(pending, BatchWriter(output, checkpoint), args.workers,
+                     args.date_from, args.date_to, include_meetup=not args.no_meetup,
+                     deadline=args.deadline)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if checkpoint is not None:
+            checkpoint.close()
+        parse_pool.configure(0)
+
+    if failed:
+        logger.warning("%d cities failed and will be retried on the next run: %s",
+                       len(failed), ', '.join(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Offline end-to-end benchmark of the scrapers against the local stub server.
+
+Reports per-source parse throughput, fetch_events latency percentiles,
+MeetupScraper.search_events latency and peak traced memory per search, all
+without touching the network. Every iteration clears the search result
+cache and the card index and revalidates every listing page, so it pays
+for the full fetch and parse. Run from the repository root:
+
+    python benchmarks/bench_fetch.py --iterations 30 --latency 0.05 --jitter 0.05
+    python benchmarks/bench_fetch.py --json bench.json   # machine-readable results
+
+Compare the JSON output between commits to catch regressions before deploying.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the benchmark's response cache away from the real one
+os.environ.setdefault('SCRAPER_CACHE_PATH', os.path.join(tempfile.mkdtemp(), 'bench_cache.db'))
+
+from stub_server import FIXTURE_DIR, StubServer  # noqa: E402
+from utils import cards, scraper, sources  # noqa: E402
+
+FIXTURES = [('insider.in', 'insider.html'), ('bookmyshow', 'bookmyshow.html'),
+            ('allevents.in', 'allevents.html')]
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples) -> dict:
+    return {'p50': percentile(samples, 50), 'p90': percentile(samples, 90),
+            'p99': percentile(samples, 99), 'max': max(samples), 'n': len(samples)}
+
+
+def bench_parse(repeat: int) -> dict:
+    results = {}
+    for name, filename in FIXTURES:
+        with open(os.path.join(FIXTURE_DIR, filename), encoding='utf-8') as f:
+            html = f.read()
+        spec = sources.SOURCES_BY_NAME[name]
+        cards = len(sources.extract_events(spec, html))
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            sources.extract_events(spec, html)
+            best = min(best, time.perf_counter() - started)
+        results[name] = {'cards': cards, 'seconds': best, 'cards_per_second': cards / best}
+    return results
+
+
+def uncached():
+    """Forget previous searches, so the next one re-extracts every card."""
+    scraper._result_cache.invalidate()
+    cards.get_index().clear()
+
+
+def bench_fetch_events(iterations: int, date: str) -> dict:
+    latencies = []
+    events = 0
+    for _ in range(iterations):
+        uncached()
+        started = time.perf_counter()
+        events = len(scraper.fetch_events('Mumbai', date))
+        latencies.append(time.perf_counter() - started)
+    return dict(summarize(latencies), events=events)
+
+
+def bench_meetup(iterations: int) -> dict:
+    latencies = []
+    events = 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        events = len(scraper.MeetupScraper().search_events('Mumbai'))
+        latencies.append(time.perf_counter() - started)
+    return dict(summarize(latencies), events=events)
+
+
+def peak_memory(date: str) -> int:
+    """Peak bytes allocated by Python during one uncached fetch_events call."""
+    uncached()
+    tracemalloc.start()
+    try:
+        scraper.fetch_events('Mumbai', date)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline scraper benchmark against recorded fixtures.')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--parse-repeat', type=int, default=5)
+    parser.add_argument('--date', default='2026-10-20', help='date passed to fetch_events')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every stub response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random latency, in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of stub responses that are 500s')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='fraction of stub responses that stall')
+    parser.add_argument('--pages', type=int, default=1, help='listing pages the stub serves per source')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    server = StubServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        hang_rate=args.hang_rate, pages=args.pages).start()
+    sources.BASE_URLS.update(server.base_urls())
+    # Revalidate every time, so each iteration goes through the stub
+    for name in scraper.SOURCE_CACHE_TTLS:
+        scraper.SOURCE_CACHE_TTLS[name] = 0
+
+    try:
+        results = {
+            'parse': bench_parse(args.parse_repeat),
+            'fetch_events': bench_fetch_events(args.iterations, args.date),
+            'meetup': bench_meetup(args.iterations),
+            'peak_memory_bytes': peak_memory(args.date),
+            'stub_requests': server.requests,
+            'cards': cards.stats(),
+        }
+    finally:
+        server.stop()
+
+    print('Parse throughput')
+    for name, result in results['parse'].items():
+        print(f"  {name:<14} {result['cards']:>5} cards  {result['seconds'] * 1000:>8.1f} ms"
+              f"  {result['cards_per_second']:>8.0f} cards/s")
+    for label in ('fetch_events', 'meetup'):
+        result = results[label]
+        print(f"{label} latency over {result['n']} runs ({result['events']} events)")
+        print('  ' + '  '.join(f"{key} {result[key] * 1000:.1f} ms" for key in ('p50', 'p90', 'p99', 'max')))
+    print(f"Peak traced memory per fetch_events: {results['peak_memory_bytes'] / 1024 / 1024:.1f} MiB")
+    print(f"Stub requests served: {results['stub_requests']}")
+    print(f"Cards extracted: {results['cards']['extracted']}, reused: {results['cards']['reused']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
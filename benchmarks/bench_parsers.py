@@ -0,0 +1,70 @@
+"""
+Compare HTML parser backends on the saved listing page fixtures.
+
+For every source and every available backend this times a full-document
+parse against a parse restricted to the card containers, plus the scraper's
+complete parse-and-extract pass. Run from the repository root:
+
+    python benchmarks/bench_parsers.py [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import parsing  # noqa: E402
+from utils.scraper import EventScraper  # noqa: E402
+from utils.sources import SOURCES_BY_NAME  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# (fixture name, source name)
+FIXTURES = [
+    ('insider', 'insider.in'),
+    ('bookmyshow', 'bookmyshow'),
+    ('allevents', 'allevents.in'),
+]
+
+
+def best_of(repeat: int, fn) -> float:
+    """Return the fastest of repeat runs, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    backends = ['html.parser'] + (['lxml'] if parsing.HAVE_LXML else [])
+    scraper = EventScraper()
+    print(f"{'source':<12} {'backend':<12} {'full ms':>9} {'strained ms':>12} {'extract ms':>11} {'cards/s':>9}")
+    for name, source in FIXTURES:
+        spec = SOURCES_BY_NAME[source]
+        with open(os.path.join(FIXTURE_DIR, f'{name}.html'), encoding='utf-8') as f:
+            html = f.read()
+        for backend in backends:
+            full = best_of(args.repeat, lambda: spec.cards.select(parsing.make_soup(html, parser=backend)))
+            strained = best_of(args.repeat, lambda: spec.cards.select(parsing.make_soup(
+                html, parse_only=spec.strainer, parser=backend)))
+
+            parsing.PARSER = backend
+            # Keep the scraper's own logging out of the timings' output
+            with contextlib.redirect_stdout(io.StringIO()):
+                cards = len(scraper._scrape_source(source, html))
+                extract = best_of(args.repeat, lambda: scraper._scrape_source(source, html))
+            print(f"{name:<12} {backend:<12} {full * 1000:>9.1f} {strained * 1000:>12.1f} "
+                  f"{extract * 1000:>11.1f} {cards / extract:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
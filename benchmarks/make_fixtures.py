@@ -0,0 +1,107 @@
+"""
+Generate the fixtures used by the benchmarks.
+
+The HTML pages mirror the markup the scrapers select on for insider.in,
+BookMyShow and allevents.in, wrapped in the kind of navigation, inline
+script and footer bulk that real listing pages carry. The JSON files mirror
+the Meetup groups/events and Nominatim search responses. Output is
+deterministic, so regenerating doesn't churn the checked-in files:
+
+    python benchmarks/make_fixtures.py
+"""
+import json
+import os
+import random
+from datetime import date, timedelta
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+CARDS_PER_PAGE = 120
+
+VENUES = ['NSCI Dome', 'Jio World Garden', 'Phoenix Marketcity', 'The Habitat', 'Antisocial',
+          'Royal Opera House', 'Shanmukhananda Hall', 'Bandra Fort Amphitheatre']
+WORDS = ['Live', 'Comedy', 'Night', 'Festival', 'Jazz', 'Open Mic', 'Workshop', 'Sunburn',
+         'Standup', 'Indie', 'Acoustic', 'Theatre', 'Food', 'Market', 'Run', 'Tour']
+
+
+def _page(title: str, cards: str, rng: random.Random) -> str:
+    nav = ''.join(f'<li><a href="/category/{i}">Category {i}</a></li>' for i in range(150))
+    script = 'window.__STATE__ = ' + repr([rng.random() for _ in range(3000)]) + ';'
+    footer = ''.join(f'<p class="footer-link"><a href="/about/{i}">Link {i}</a></p>' for i in range(200))
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title>'
+            f'<script>{script}</script><style>.x{{color:red}}</style></head><body>'
+            f'<header><nav><ul>{nav}</ul></nav></header><main><section class="listing">{cards}'
+            f'</section></main><footer>{footer}</footer></body></html>')
+
+
+def _events(rng: random.Random):
+    start = date(2026, 10, 18)
+    for i in range(CARDS_PER_PAGE):
+        day = start + timedelta(days=i // 6)
+        title = ' '.join(rng.sample(WORDS, 3)) + f' {i}'
+        yield i, title, day, rng.choice(VENUES)
+
+
+def insider(rng: random.Random) -> str:
+    cards = ''.join(
+        f'<div data-event-id="{i}" class="card-wrapper"><a href="/event/{i}-{day:%d%m}">'
+        f'<img src="https://media.insider.in/{i}.jpg"></a><h3>{title}</h3>'
+        f'<p class="date-display">{day.day} {day:%b %Y} | 7:00 PM</p>'
+        f'<p class="venue-display">{venue}</p><p class="event-description">{title} live in Mumbai</p></div>'
+        for i, title, day, venue in _events(rng))
+    return _page('Events in Mumbai | Insider', cards, rng)
+
+
+def bookmyshow(rng: random.Random) -> str:
+    cards = ''.join(
+        f'<div class="event-card"><a href="/events/{i}/ET{i:06d}"><img src="https://assets.bms.com/{i}.jpg"></a>'
+        f'<h4>{title}</h4><div class="date-venue"><time>{day:%Y-%m-%d}</time><address>{venue}</address></div></div>'
+        for i, title, day, venue in _events(rng))
+    return _page('Events in Mumbai - BookMyShow', cards, rng)
+
+
+def allevents(rng: random.Random) -> str:
+    cards = ''.join(
+        f'<li class="event-item"><a href="https://allevents.in/mumbai/{i}"><img src="https://cdn.allevents.in/{i}.jpg"></a>'
+        f'<div class="title">{title}</div><div class="date">{day:%d/%m/%Y}</div>'
+        f'<div class="venue">{venue}</div><div class="description">Join us for {title}</div></li>'
+        for i, title, day, venue in _events(rng))
+    return _page('Events in Mumbai - AllEvents', cards, rng)
+
+
+def meetup_groups(rng: random.Random) -> list:
+    return [{'urlname': f'mumbai-group-{i}', 'name': f"{' '.join(rng.sample(WORDS, 2))} Club {i}",
+             'city': 'Mumbai', 'group_photo': {'photo_link': f'https://secure.meetupstatic.com/{i}.jpeg'}}
+            for i in range(20)]
+
+
+def meetup_events(rng: random.Random) -> list:
+    start = 1792281600000  # 2026-10-18T00:00:00Z in epoch milliseconds
+    return [{'name': ' '.join(rng.sample(WORDS, 3)), 'description': 'Meet fellow enthusiasts. ' * 20,
+             'time': start + i * 86400000, 'link': f'https://www.meetup.com/event/{i}',
+             'yes_rsvp_count': rng.randint(0, 200),
+             'venue': {'name': rng.choice(VENUES), 'address_1': 'Main Road', 'city': 'Mumbai',
+                       'state': 'MH', 'country': 'in'}}
+            for i in range(5)]
+
+
+def nominatim(rng: random.Random) -> list:
+    return [{'lat': '19.0759837', 'lon': '72.8776559', 'display_name': 'Mumbai, Maharashtra, India'}]
+
+
+def main():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, build in [('insider', insider), ('bookmyshow', bookmyshow), ('allevents', allevents)]:
+        path = os.path.join(FIXTURE_DIR, f'{name}.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(build(random.Random(name)))
+        print(f"Wrote {path}")
+    for name, build in [('meetup_groups', meetup_groups), ('meetup_events', meetup_events),
+                        ('nominatim', nominatim)]:
+        path = os.path.join(FIXTURE_DIR, f'{name}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(build(random.Random(name)), f, indent=1)
+        print(f"Wrote {path}")
+
+
+if __name__ == '__main__':
+    main()
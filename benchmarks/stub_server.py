@@ -0,0 +1,157 @@
+"""
+Local stub of every upstream the scrapers talk to, serving recorded fixtures.
+
+Each upstream is mounted under its own path prefix, so pointing the
+scrapers at it only takes SCRAPER_BASE_URLS (see StubServer.base_urls).
+Latency and failures can be injected to reproduce slow or flaky sources.
+Run standalone to poke at it by hand:
+
+    python benchmarks/stub_server.py --port 8765 --latency 0.2 --error-rate 0.1
+"""
+import argparse
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# (path pattern, fixture file, content type)
+ROUTES = [
+    (re.compile(r'^/insider/[^/]+/all-events$'), 'insider.html', 'text/html; charset=utf-8'),
+    (re.compile(r'^/bookmyshow/[^/]+/events$'), 'bookmyshow.html', 'text/html; charset=utf-8'),
+    (re.compile(r'^/allevents/[^/]+/events$'), 'allevents.html', 'text/html; charset=utf-8'),
+    (re.compile(r'^/meetup/find/groups$'), 'meetup_groups.json', 'application/json'),
+    (re.compile(r'^/meetup/[^/]+/events$'), 'meetup_events.json', 'application/json'),
+    (re.compile(r'^/nominatim/search$'), 'nominatim.json', 'application/json'),
+]
+# What an HTML listing serves past its last page
+EMPTY_LISTING = b'<html><body><p>No more events</p></body></html>'
+_PAGE = re.compile(r'(?:^|&)page=(\d+)')
+
+
+class StubServer:
+    """
+    Threaded HTTP server replaying the fixtures.
+
+    Args:
+        latency: seconds added before every response
+        jitter: extra random latency, up to this many seconds
+        error_rate: fraction of requests answered with a 500
+        hang_rate: fraction of requests that stall for hang_seconds, to trip timeouts
+        pages: listing pages per source; ?page=N past this serves an empty listing
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, hang_rate: float = 0.0,
+                 hang_seconds: float = 30.0, seed: int = 0, pages: int = 1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.pages = pages
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bodies = {}
+        for _, name, _ in ROUTES:
+            with open(os.path.join(FIXTURE_DIR, name), 'rb') as f:
+                self._bodies[name] = f.read()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def base_urls(self) -> Dict[str, str]:
+        """Base URLs to put in SCRAPER_BASE_URLS / utils.sources.BASE_URLS."""
+        return {
+            'insider.in': f'{self.url}/insider',
+            'bookmyshow': f'{self.url}/bookmyshow',
+            'allevents.in': f'{self.url}/allevents',
+            'meetup': f'{self.url}/meetup',
+            'nominatim': f'{self.url}/nominatim',
+        }
+
+    def _roll(self):
+        with self._lock:
+            self.requests += 1
+            return (self._random.random(), self._random.random(), self._random.random())
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are separate writes; don't let Nagle delay the body
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                path, _, query = self.path.partition('?')
+                page = _PAGE.search(query)
+                delay_roll, error_roll, hang_roll = server._roll()
+                time.sleep(server.latency + delay_roll * server.jitter)
+                if hang_roll < server.hang_rate:
+                    time.sleep(server.hang_seconds)
+                if error_roll < server.error_rate:
+                    return self._send(500, b'injected error', 'text/plain')
+                for pattern, name, content_type in ROUTES:
+                    if pattern.match(path):
+                        if name.endswith('.html') and page and int(page.group(1)) > server.pages:
+                            return self._send(200, EMPTY_LISTING, content_type)
+                        return self._send(200, server._bodies[name], content_type)
+                self._send(404, b'not found', 'text/plain')
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'StubServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the benchmark fixtures as fake upstreams.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--hang-rate', type=float, default=0.0)
+    parser.add_argument('--pages', type=int, default=1)
+    args = parser.parse_args()
+
+    server = StubServer(port=args.port, latency=args.latency, jitter=args.jitter,
+                        error_rate=args.error_rate, hang_rate=args.hang_rate,
+                        pages=args.pages).start()
+    print(f"Serving fixtures on {server.url}")
+    print('SCRAPER_BASE_URLS=' + ','.join(f'{k}={v}' for k, v in server.base_urls().items()))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,3 +4,12 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'app.db')
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 SECRET_KEY = 'your_secret_key'
+
+# Seconds a city's stored events are served before it is scraped again
+EVENT_STORE_MAX_AGE = 3600
+
+# Threads running background search jobs, and seconds a finished job stays pollable
+# Jobs are held in process memory: serve the app from one worker process (or with
+# sticky sessions) so polls reach the process that owns the job
+SEARCH_JOB_WORKERS = 16
+SEARCH_JOB_TTL = 600
@@ -0,0 +1,182 @@
+"""
+Background crawler that keeps the most searched cities pre-warmed.
+
+Run it next to the web app:
+
+    python crawler.py --top 50 --interval 1800
+
+Every poll it loads the most searched cities from the event store, queues
+those whose data is due for a refresh (with jitter so cities don't all come
+due at once) ordered by search frequency and staleness, and scrapes them with
+EventScraper and MeetupScraper. The web tier then mostly reads fresh events
+straight from the store.
+"""
+import argparse
+import heapq
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from app import create_app
+from utils import http_client, parse_pool
+from utils.scraper import (CRAWL_DEADLINE, MeetupScraper, answered_sources, meetup_event_record,
+                           missing_sources, scrape_location)
+
+logger = logging.getLogger('crawler')
+
+
+class CrawlScheduler:
+    """Priority queue of cities due for a refresh."""
+
+    def __init__(self, interval: float, jitter: float = 0.2):
+        self.interval = interval
+        self.jitter = jitter
+        self._queue = []
+        self._queued = set()
+        # Jittered refresh interval per city, re-rolled after each crawl
+        self._intervals = {}
+        self._lock = threading.Lock()
+
+    def _interval_for(self, city: str) -> float:
+        if city not in self._intervals:
+            self._intervals[city] = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        return self._intervals[city]
+
+    def priority(self, city: Dict, now: datetime) -> float:
+        """Higher for frequently searched cities whose data is older."""
+        if city['crawled_at'] is None:
+            staleness = 2.0
+        else:
+            staleness = (now - city['crawled_at']).total_seconds() / self._interval_for(city['city'])
+        return math.log1p(city['search_count']) * staleness
+
+    def update(self, cities: List[Dict]) -> int:
+        """Queue every city that is due for a refresh; return how many were added."""
+        now = datetime.utcnow()
+        added = 0
+        with self._lock:
+            for city in cities:
+                name = city['city']
+                if name in self._queued:
+                    continue
+                due = city['crawled_at'] is None or \
+                    (now - city['crawled_at']).total_seconds() >= self._interval_for(name)
+                if due:
+                    heapq.heappush(self._queue, (-self.priority(city, now), name))
+                    self._queued.add(name)
+                    added += 1
+        return added
+
+    def pop(self):
+        with self._lock:
+            if not self._queue:
+                return None
+            _, name = heapq.heappop(self._queue)
+            return name
+
+    def done(self, city: str) -> None:
+        with self._lock:
+            self._queued.discard(city)
+            self._intervals.pop(city, None)
+
+
+def crawl_city(store, city: str, include_meetup: bool = True, deadline: float = CRAWL_DEADLINE) -> int:
+    """Scrape one city from every source and save it to the store."""
+    result = scrape_location(city, deadline=deadline)
+    missing = missing_sources(result)
+    if missing:
+        # Like a web search, a partial scrape isn't saved; the city stays
+        # stale so the next poll retries the missing sources
+        logger.warning("Skipping save for %s: sources timed out or failed (%s)",
+                       city, ', '.join(missing))
+        return 0
+    if result['skipped']:
+        # Their circuits are open; their stored rows are kept as they are
+        logger.warning("Saving %s without unhealthy sources: %s", city, ', '.join(result['skipped']))
+    events = list(result['events'])
+    sources = answered_sources(result)
+    if include_meetup:
+        meetup = MeetupScraper().search_events_with_status(city)
+        events.extend(meetup_event_record(event) for event in meetup['events'])
+        if meetup['complete']:
+            sources.append('meetup')
+        else:
+            # Keep the stored Meetup rows rather than delete what wasn't seen
+            logger.warning("Meetup search failed for %s; keeping its stored Meetup events", city)
+    # A listing page that failed leaves the crawl incomplete: its rows are
+    # upserted, but nothing is deleted and the city isn't marked fresh
+    return store.save(city, events, complete=not result['incomplete'], sources=sources)
+
+
+def run(store, scheduler: CrawlScheduler, top: int, workers: int, poll: float,
+        include_meetup: bool = True, once: bool = False, deadline: float = CRAWL_DEADLINE) -> None:
+    executor = ThreadPoolExecutor(max_workers=workers)
+    slots = threading.BoundedSemaphore(workers)
+
+    def work(city):
+        try:
+            started = time.monotonic()
+            count = crawl_city(store, city, include_meetup, deadline)
+            logger.info("Crawled %s: %d events in %.1fs", city, count, time.monotonic() - started)
+        except Exception:
+            logger.exception("Error crawling %s", city)
+        finally:
+            scheduler.done(city)
+            slots.release()
+
+    while True:
+        added = scheduler.update(store.hot_cities(top))
+        if added:
+            logger.info("Queued %d cities for refresh", added)
+        while True:
+            city = scheduler.pop()
+            if city is None:
+                break
+            # Wait for a free worker so the queue, not the executor, decides the order
+            slots.acquire()
+            executor.submit(work, city)
+        if once:
+            executor.shutdown(wait=True)
+            return
+        time.sleep(poll * random.uniform(0.8, 1.2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-warm events for the most searched cities.')
+    parser.add_argument('--top', type=int, default=50, help='number of most searched cities to keep warm')
+    parser.add_argument('--interval', type=float, default=1800, help='seconds between refreshes of a city')
+    parser.add_argument('--jitter', type=float, default=0.2, help='random +/- fraction applied to the interval')
+    parser.add_argument('--poll', type=float, default=60, help='seconds between scheduler passes')
+    parser.add_argument('--workers', type=int, default=4, help='cities crawled concurrently')
+    parser.add_argument('--per-host', type=int, default=2, help='concurrent requests allowed per host')
+    parser.add_argument('--deadline', type=float, default=CRAWL_DEADLINE,
+                        help='seconds allowed for one city across all its sources')
+    parser.add_argument('--parse-processes', type=int, default=0,
+                        help='parse listing pages in this many processes (0 parses in-thread)')
+    parser.add_argument('--parse-backlog', type=int, default=None,
+                        help='pages allowed to wait for a parse process before fetching pauses')
+    parser.add_argument('--no-meetup', action='store_true', help='skip the Meetup API')
+    parser.add_argument('--once', action='store_true', help='run a single pass and exit')
+    parser.add_argument('--log-level', default='INFO', help='logging level (DEBUG, INFO, WARNING, ...)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    load_dotenv()
+    app = create_app()
+    http_client.set_host_limit(args.per_host)
+    if args.parse_processes:
+        parse_pool.configure(args.parse_processes, args.parse_backlog)
+    scheduler = CrawlScheduler(args.interval, args.jitter)
+    run(app.extensions['event_store'], scheduler, args.top, args.workers, args.poll,
+        include_meetup=not args.no_meetup, once=args.once, deadline=args.deadline)
+
+
+if __name__ == '__main__':
+    main()
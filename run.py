@@ -1,10 +1,15 @@
 from dotenv import load_dotenv
+import logging
 import os
 from app import create_app
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Set LOG_LEVEL=DEBUG to see per-request scraper details
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
 app = create_app()
 
 if __name__ == '__main__':
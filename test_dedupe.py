@@ -0,0 +1,53 @@
+from datetime import date
+
+from utils.dedupe import dedupe_events
+
+
+def _event(i, title, venue, source='insider.in'):
+    return {
+        'title': title,
+        'date': '2026-10-18',
+        'event_date': date(2026, 10, 18),
+        'venue': venue,
+        'description': '',
+        'url': f'https://example.com/{i}',
+        'image_url': None,
+        'source': source,
+    }
+
+
+def test_duplicates_across_sources_merge():
+    events = [
+        _event(1, 'Arijit Singh Live in Concert', 'NSCI Dome, Worli'),
+        _event(2, 'Arijit Singh - Live Concert', 'NSCI Dome', source='bookmyshow'),
+    ]
+    merged = dedupe_events(events)
+    assert len(merged) == 1
+    assert merged[0]['venue'] == 'NSCI Dome, Worli'
+
+
+def test_unknown_venue_joins_a_known_one():
+    events = [
+        _event(1, 'Comedy Night', 'Venue not specified'),
+        _event(2, 'Comedy Night', 'The Habitat', source='bookmyshow'),
+    ]
+    merged = dedupe_events(events)
+    assert [event['venue'] for event in merged] == ['The Habitat']
+
+
+def test_unknown_venue_does_not_chain_different_venues():
+    events = [
+        _event(1, 'Comedy Night', 'Venue not specified'),
+        _event(2, 'Comedy Night', 'The Habitat', source='bookmyshow'),
+        _event(3, 'Comedy Night', 'Canvas Laugh Club', source='allevents.in'),
+    ]
+    merged = dedupe_events(events)
+    assert sorted(event['venue'] for event in merged) == ['Canvas Laugh Club', 'The Habitat']
+
+
+def test_numbered_parts_stay_apart():
+    events = [
+        _event(1, 'Workshop Part 1', 'The Habitat'),
+        _event(2, 'Workshop Part 2', 'The Habitat', source='bookmyshow'),
+    ]
+    assert len(dedupe_events(events)) == 2
@@ -1,4 +1,4 @@
-import requests
+from utils import http_client
 
 def get_events(location, date):
     API_URL = 'https://www.eventbriteapi.com/v3/events/search/'
@@ -10,7 +10,7 @@ def get_events(location, date):
         'start_date.range_end': date + 'T23:59:59Z',
         'token': API_KEY
     }
-    response = requests.get(API_URL, params=params)
+    response = http_client.get(API_URL, params=params)
 
     if response.status_code == 200:
         data = response.json()
@@ -0,0 +1,155 @@
+"""
+In-process caching helpers.
+
+SingleFlight coalesces concurrent calls for the same key so only one of them
+does the work and the others wait for its result. ResultCache builds on it to
+keep a bounded, TTL-based cache of expensive results, serving slightly stale
+values while a background refresh runs.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class ResultCache:
+    """
+    Bounded LRU cache with a TTL and stale-while-revalidate.
+
+    Entries younger than ttl are served directly. Entries up to ttl + stale_ttl
+    old are still served, but trigger a single background refresh. Misses are
+    computed once per key no matter how many callers ask concurrently.
+
+    should_cache(value) decides whether a computed value is kept at all, and
+    ttl_for(value), if given, overrides ttl for that value (e.g. to keep a
+    degraded result only briefly).
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0, max_entries: int = 256,
+                 should_cache: Callable[[Any], bool] = None,
+                 ttl_for: Callable[[Any], float] = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.should_cache = should_cache or (lambda value: True)
+        self.ttl_for = ttl_for or (lambda value: self.ttl)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flight = SingleFlight()
+        self._refreshing = set()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, ttl, value = entry
+                age = now - stored_at
+                if age < ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                if age < ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['stale_hits'] += 1
+                    stale = True
+                    refresh = key not in self._refreshing
+                    if refresh:
+                        self._refreshing.add(key)
+                else:
+                    del self._entries[key]
+                    stale = False
+            else:
+                stale = False
+            if not stale:
+                self._stats['misses'] += 1
+
+        if stale:
+            if refresh:
+                threading.Thread(target=self._refresh, args=(key, compute), daemon=True).start()
+            return value
+        return self._flight.do(key, lambda: self._compute(key, compute))
+
+    def _refresh(self, key: Hashable, compute: Callable[[], Any]) -> None:
+        with self._lock:
+            self._stats['refreshes'] += 1
+        try:
+            self._flight.do(key, lambda: self._compute(key, compute))
+        except Exception as e:
+            logger.warning("Background refresh failed for %r: %s", key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        value = compute()
+        if self.should_cache(value):
+            ttl = self.ttl_for(value)
+            with self._lock:
+                self._entries[key] = (time.monotonic(), ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: Hashable = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop the entries for which predicate(key, value) is true; return how many."""
+        with self._lock:
+            keys = [key for key, (_, _, value) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
@@ -0,0 +1,191 @@
+"""
+Per-card content hashes for incremental re-crawls.
+
+Every event card on a listing page is hashed from its raw HTML. The index
+remembers, per listing URL, the record extracted from each card hash in
+the last crawl. On the next crawl, extract_events looks each card's hash up
+before extracting it: an unchanged card reuses the stored record and skips
+the field selectors and date parsing entirely, and only new or edited cards
+are extracted.
+
+Comparing the new crawl with the stored one also yields a per-city diff of
+added, changed and removed events. Events are matched by URL, so an edited
+card shows up as changed rather than as one removal and one addition.
+Cache invalidations can then be limited to what actually changed. The
+event store doesn't rely on the diff: the index is updated even when a
+partial crawl isn't saved, so the store compares its own rows with the
+crawl instead.
+
+The index lives in the same SQLite file as the HTTP response cache.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Dict, List
+
+from utils import http_cache, metrics
+from utils.records import EventRecord
+
+CARD_INDEX_PATH = os.environ.get('SCRAPER_CARD_INDEX_PATH', http_cache.CACHE_PATH)
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cards (
+    listing TEXT NOT NULL,
+    card_hash TEXT NOT NULL,
+    record TEXT NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (listing, card_hash)
+);
+'''
+
+_stats_lock = threading.Lock()
+_stats = {'reused': 0, 'extracted': 0}
+
+
+def card_hash(card) -> str:
+    """Hash an event card's HTML fragment."""
+    # formatter=None skips entity escaping; the output only has to be stable
+    return hashlib.blake2b(card.decode(formatter=None).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def count(reused: int, extracted: int) -> None:
+    """Count cards reused from the index and cards extracted afresh."""
+    with _stats_lock:
+        _stats['reused'] += reused
+        _stats['extracted'] += extracted
+
+
+def stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _dump(record: EventRecord) -> str:
+    return json.dumps(record.to_dict())
+
+
+def _load(card: str, raw: str) -> EventRecord:
+    fields = json.loads(raw)
+    if fields['event_date']:
+        fields['event_date'] = date.fromisoformat(fields['event_date'])
+    return EventRecord(card_hash=card, **fields)
+
+
+def _identity(record: EventRecord) -> str:
+    # Cards without a real link can only be told apart by their content
+    return record.url if record.url and record.url.startswith('http') else record.card_hash
+
+
+def empty_diff() -> Dict[str, List[EventRecord]]:
+    return {'added': [], 'changed': [], 'removed': []}
+
+
+def diff(previous: Dict[str, EventRecord], events: List[EventRecord],
+         complete: bool = True) -> Dict[str, List[EventRecord]]:
+    """
+    Compare a listing's new events with its previous cards (card hash ->
+    record). Events are matched by URL. Unless the crawl is complete, cards
+    that weren't seen again may just be on pages that weren't fetched, so
+    nothing is reported removed.
+    """
+    current = {event.card_hash for event in events}
+    gone = {_identity(record): record for card, record in previous.items() if card not in current}
+    result = empty_diff()
+    seen = set()
+    for event in events:
+        if event.card_hash in previous or event.card_hash in seen:
+            continue
+        seen.add(event.card_hash)
+        if gone.pop(_identity(event), None) is not None:
+            result['changed'].append(event)
+        else:
+            result['added'].append(event)
+    if complete:
+        result['removed'] = list(gone.values())
+    return result
+
+
+def merge_diffs(diffs: List[Dict[str, List[EventRecord]]]) -> Dict[str, List[EventRecord]]:
+    merged = empty_diff()
+    for part in diffs:
+        for kind, events in part.items():
+            merged[kind].extend(events)
+    return merged
+
+
+class CardIndex:
+    """Persistent listing URL -> {card hash: record} index of the last crawl."""
+
+    def __init__(self, path: str = CARD_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        return http_cache.thread_connection(self._local, self.path, _SCHEMA)
+
+    def previous(self, listing: str) -> Dict[str, EventRecord]:
+        """The cards of a listing's last crawl, by card hash."""
+        rows = self._connect().execute(
+            'SELECT card_hash, record FROM cards WHERE listing = ?', (listing,)).fetchall()
+        return {card: _load(card, raw) for card, raw in rows}
+
+    def update(self, listing: str, events: List[EventRecord], complete: bool = True,
+               previous: Dict[str, EventRecord] = None) -> Dict[str, List[EventRecord]]:
+        """
+        Record a listing's new crawl and return its diff against the last
+        one. A complete crawl replaces the listing's cards; an incomplete one
+        (e.g. pagination stopped early) only adds to them.
+        """
+        if previous is None:
+            previous = self.previous(listing)
+        events = [event for event in events if event.card_hash]
+        changes = diff(previous, events, complete)
+        current = {event.card_hash for event in events}
+        gone = [(listing, card) for card in previous if card not in current] if complete else []
+        new = changes['added'] + changes['changed']
+        if not new and not gone:
+            return changes
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN')
+        try:
+            conn.executemany('DELETE FROM cards WHERE listing = ? AND card_hash = ?', gone)
+            conn.executemany(
+                'INSERT OR REPLACE INTO cards (listing, card_hash, record, seen_at) VALUES (?, ?, ?, ?)',
+                [(listing, event.card_hash, _dump(event), now) for event in new])
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return changes
+
+    def clear(self) -> None:
+        self._connect().execute('DELETE FROM cards')
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> CardIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CardIndex()
+    return _index
+
+
+def _collect_metrics():
+    for name, value in stats().items():
+        yield 'eventfinder_cards_total', 'counter', {'result': name}, value
+
+
+metrics.register_collector(_collect_metrics)
@@ -0,0 +1,115 @@
+"""
+Date normalization for scraped event listings.
+
+Listing pages repeat the same handful of date strings across dozens of
+cards, so parsing is memoized on the raw string, and all patterns are
+compiled once at import. Dates are built directly from the matched
+groups instead of trying strptime formats one after another.
+"""
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+MONTHS = {name: number for number, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+_MONTH = r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?'
+
+_ISO = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+# Words like "from 12 oct to 14 oct" that surround the date itself
+_NOISE = re.compile(r'\b(?:from|to|until|starts?|ends?|on)\b')
+_ORDINAL = re.compile(r'(\d)(?:st|nd|rd|th)\b')
+_WHITESPACE = re.compile(r'\s+')
+
+# Each pattern yields (day, month, year) groups in the order given by its layout
+_PATTERNS = [
+    (re.compile(r'\b(\d{1,2})\s+' + _MONTH + r'(?:,?\s+(\d{4}))?'), ('day', 'month', 'year')),
+    (re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b'), ('year', 'month', 'day')),
+    (re.compile(r'\b(\d{1,2})/(\d{1,2})/(\d{4})\b'), ('day', 'month', 'year')),
+    (re.compile(r'\b(\d{1,2})-(\d{1,2})-(\d{4})\b'), ('day', 'month', 'year')),
+    (re.compile(r'\b' + _MONTH + r'\s+(\d{1,2})\b(?:,?\s+(\d{4}))?'), ('month', 'day', 'year')),
+]
+
+# A year-less date this far in the past is taken to mean next year's
+_YEAR_ROLLOVER = timedelta(days=60)
+
+
+def _infer_year(month: int, day: int, today: date) -> Optional[date]:
+    try:
+        candidate = date(today.year, month, day)
+    except ValueError:
+        return None
+    if candidate < today - _YEAR_ROLLOVER:
+        try:
+            return date(today.year + 1, month, day)
+        except ValueError:
+            return None
+    return candidate
+
+
+@lru_cache(maxsize=8192)
+def _parse(date_text: str, today: date) -> Optional[date]:
+    # Fast path for dates that are already normalized
+    match = _ISO.fullmatch(date_text)
+    if match:
+        try:
+            return date(*map(int, match.groups()))
+        except ValueError:
+            return None
+
+    text = _ORDINAL.sub(r'\1', date_text.lower())
+    text = _WHITESPACE.sub(' ', _NOISE.sub(' ', text)).strip()
+    for pattern, layout in _PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        parts = dict(zip(layout, match.groups()))
+        month = parts['month']
+        month = MONTHS[month] if month in MONTHS else int(month)
+        day = int(parts['day'])
+        if parts['year'] is None:
+            return _infer_year(month, day, today)
+        try:
+            return date(int(parts['year']), month, day)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date(date_text: str) -> Optional[date]:
+    """Parse a scraped date string into a date, or None if it has no date in it."""
+    if not date_text:
+        return None
+    return _parse(date_text, date.today())
+
+
+def parse_dates(date_texts: Iterable[Optional[str]]) -> List[Optional[date]]:
+    """Parse a page's worth of date strings, parsing each distinct string once."""
+    today = date.today()
+    seen: Dict[str, Optional[date]] = {}
+    parsed = []
+    for date_text in date_texts:
+        if not date_text:
+            parsed.append(None)
+            continue
+        if date_text not in seen:
+            seen[date_text] = _parse(date_text, today)
+        parsed.append(seen[date_text])
+    return parsed
+
+
+def normalize_date(date_text: str) -> Optional[str]:
+    """Parse a scraped date string into YYYY-MM-DD, or None."""
+    parsed = parse_date(date_text)
+    return parsed.isoformat() if parsed else None
+
+
+def to_date(value) -> Optional[date]:
+    """Coerce a date, or a date string in any supported format, to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return parse_date(value)
+    return None
@@ -0,0 +1,201 @@
+"""
+Near-duplicate detection across event sources.
+
+The same event is often listed by several sources with slightly different
+titles ("Arijit Singh Live in Concert" / "Arijit Singh - Live Concert") or
+venue strings. Titles are normalized to tokens and shingled into character
+trigrams, and each event gets a MinHash signature. Locality-sensitive
+hashing over signature bands, blocked by event date, yields candidate
+pairs without comparing every event to every other, so the stage stays
+close to linear in the number of events. Candidates are confirmed with the
+exact trigram Jaccard similarity and a venue check. An event with an
+unknown venue matches any venue, so two clusters are only joined when no
+pair of known venues across them conflicts; otherwise one "Venue not
+specified" listing could chain different events together. Each cluster of
+duplicates is then merged into one event that keeps the richest value of
+every field.
+"""
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from utils.dates import to_date
+from utils.records import EventRecord, venue_name
+from utils.sources import SOURCES
+
+# MinHash signature length, split into BANDS bands of ROWS values each.
+# Pairs above roughly (1 / BANDS) ** (1 / ROWS) ~ 0.64 similarity become candidates.
+BANDS = 6
+ROWS = 4
+# Confirmed duplicates need this title trigram similarity...
+TITLE_THRESHOLD = 0.6
+# ...and venues sharing this fraction of tokens (or one naming a part of the other),
+# unless either venue is unknown. Numbers in both titles must match exactly.
+VENUE_THRESHOLD = 0.5
+
+_MERSENNE = (1 << 61) - 1
+_SEEDS = [(1 + 2 * zlib.crc32(f'a{i}'.encode()), zlib.crc32(f'b{i}'.encode())) for i in range(BANDS * ROWS)]
+
+_TOKEN = re.compile(r'[^\W_]+')
+# Words that vary between listings of the same event without telling events apart
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'at', 'by', 'for', 'in', 'of', 'on', 'the', 'to', 'with',
+    'live', 'presents', 'presented', 'tickets', 'show', 'event',
+})
+
+# Field values that mean "unknown" and never win a merge
+PLACEHOLDERS = frozenset(
+    {'', '#', 'no title', 'no description available', 'venue not specified',
+     'location not specified', 'date not specified'}
+    | {spec.default_description.lower() for spec in SOURCES}
+)
+
+
+def tokens(text: str) -> List[str]:
+    """Lowercase word tokens of a title or venue, without stopwords."""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def shingles(text: str) -> frozenset:
+    """Character trigrams of the normalized text, robust to small spelling differences."""
+    # Joined without spaces, so "Stand-up" and "Standup" shingle alike
+    normalized = ''.join(tokens(text))
+    if len(normalized) < 3:
+        return frozenset([normalized]) if normalized else frozenset()
+    return frozenset(normalized[i:i + 3] for i in range(len(normalized) - 2))
+
+
+@lru_cache(maxsize=65536)
+def _permuted(item: str) -> tuple:
+    """The item's value under every hash permutation; trigrams repeat a lot across titles."""
+    h = zlib.crc32(item.encode('utf-8'))
+    return tuple((a * h + b) % _MERSENNE for a, b in _SEEDS)
+
+
+def minhash(items: frozenset) -> List[int]:
+    """MinHash signature of a non-empty set: the per-permutation minimum over its items."""
+    return list(map(min, zip(*map(_permuted, items))))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _is_placeholder(value) -> bool:
+    return not isinstance(value, str) or value.strip().lower() in PLACEHOLDERS
+
+
+class _Entry:
+    __slots__ = ('event', 'event_date', 'title', 'numbers', 'venue')
+
+    def __init__(self, event: Dict):
+        self.event = event
+        self.event_date = event.get('event_date') or to_date(event.get('date'))
+        title = event.get('title') or ''
+        self.title = shingles(title)
+        # "Part 1" and "Part 2" shingle alike but are different events
+        self.numbers = frozenset(token for token in tokens(title) if token.isdigit())
+        venue = venue_name(event.get('venue'))
+        self.venue = None if _is_placeholder(venue) else frozenset(tokens(venue))
+
+
+def _same_venue(a: frozenset, b: frozenset) -> bool:
+    return jaccard(a, b) >= VENUE_THRESHOLD or a <= b or b <= a
+
+
+def _same_event(a: _Entry, b: _Entry) -> bool:
+    if a.numbers and b.numbers and a.numbers != b.numbers:
+        return False
+    if jaccard(a.title, b.title) < TITLE_THRESHOLD:
+        return False
+    if a.venue is None or b.venue is None:
+        return True
+    return _same_venue(a.venue, b.venue)
+
+
+def _find(parents: List[int], i: int) -> int:
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def clusters(events: List[Dict]) -> List[List[int]]:
+    """
+    Group the indexes of duplicate events. Clusters are ordered by their
+    first event, and indexes within a cluster ascend.
+    """
+    entries = [_Entry(event) for event in events]
+    parents = list(range(len(entries)))
+    # Known venues of each cluster, by root
+    venues = {i: [entry.venue] if entry.venue is not None else [] for i, entry in enumerate(entries)}
+    buckets: Dict[tuple, List[int]] = {}
+    for i, entry in enumerate(entries):
+        if not entry.title:
+            continue
+        signature = minhash(entry.title)
+        for band in range(BANDS):
+            key = (entry.event_date, band, *signature[band * ROWS:(band + 1) * ROWS])
+            buckets.setdefault(key, []).append(i)
+
+    checked = set()
+    for members in buckets.values():
+        for position, i in enumerate(members):
+            for j in members[position + 1:]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                root_i, root_j = _find(parents, i), _find(parents, j)
+                if root_i == root_j or not _same_event(entries[i], entries[j]):
+                    continue
+                if all(_same_venue(a, b) for a in venues[root_i] for b in venues[root_j]):
+                    root, other = min(root_i, root_j), max(root_i, root_j)
+                    parents[other] = root
+                    venues[root].extend(venues.pop(other))
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(entries)):
+        groups.setdefault(_find(parents, i), []).append(i)
+    return [groups[root] for root in sorted(groups)]
+
+
+def _richest(values) -> Optional[str]:
+    """The longest value that isn't a placeholder, or None if there is none."""
+    real = [value for value in values if not _is_placeholder(value)]
+    return max(real, key=len) if real else None
+
+
+def merge(events: List[Dict]) -> Dict:
+    """
+    Merge duplicates into one event, keeping the richest value of each field.
+    Fields without a real value anywhere keep the first event's value.
+    """
+    first = events[0]
+    merged = first.copy() if isinstance(first, EventRecord) else dict(first)
+    for field, values in (
+        ('title', (event.get('title') for event in events)),
+        ('venue', (venue_name(event.get('venue')) for event in events)),
+        ('description', (event.get('description') for event in events)),
+    ):
+        value = _richest(values)
+        if value is not None:
+            merged[field] = value
+    for field in ('url', 'image_url'):
+        merged[field] = next((event[field] for event in events
+                              if isinstance(event.get(field), str) and event[field].startswith('http')),
+                             merged.get(field))
+    dated = next((event for event in events
+                  if event.get('event_date') or to_date(event.get('date'))), None)
+    if dated is not None:
+        merged['date'] = dated.get('date')
+        merged['event_date'] = dated.get('event_date') or to_date(dated.get('date'))
+    return merged
+
+
+def dedupe_events(events: List[Dict]) -> List[Dict]:
+    """Collapse near-duplicate events, keeping the order of first appearance."""
+    return [merge([events[i] for i in group]) if len(group) > 1 else events[group[0]]
+            for group in clusters(events)]
@@ -0,0 +1,263 @@
+"""
+Cached, rate-limited geocoding for city names.
+
+Nominatim asks clients to stay under one request per second, and a city's
+coordinates practically never change, so lookups go through a persistent
+SQLite cache (in the same database file as the HTTP response cache) before
+they reach the API. Unknown places are cached too, for a shorter time.
+Misses share one process-wide token bucket, and concurrent lookups for the
+same city are coalesced into a single request.
+
+Cache keys are normalized city names. Resolving a qualified name also
+caches it under its primary component, so "Mumbai", " mumbai " and "Mumbai,
+India" all hit the entry once "Mumbai, India" has been resolved. A qualified
+name only falls back to its primary component when its extra components
+are all part of the name that entry was resolved from; "Portland, Maine"
+never reuses the coordinates of "Portland, Oregon".
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from utils import http_cache, http_client, metrics
+from utils.cache import SingleFlight
+from utils.sources import BASE_URLS
+
+GEOCODE_CACHE_PATH = os.environ.get('SCRAPER_GEOCODE_CACHE_PATH', http_cache.CACHE_PATH)
+# How long a resolved place is kept, and how long an unknown place is remembered, in seconds
+GEOCODE_TTL = 30 * 24 * 3600
+GEOCODE_NEGATIVE_TTL = 24 * 3600
+# Nominatim's usage policy allows at most one request per second
+GEOCODE_RATE = float(os.environ.get('SCRAPER_GEOCODE_RATE', 1.0))
+GEOCODE_BURST = 1
+# Per-request timeout, and the longest a lookup waits for a rate limit token, in seconds
+GEOCODE_TIMEOUT = 5
+GEOCODE_MAX_WAIT = 10
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r'[^\w\s,]')
+_WHITESPACE = re.compile(r'\s+')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS geocodes (
+    key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    lat REAL,
+    lon REAL,
+    stored_at REAL NOT NULL
+);
+'''
+
+Coordinates = Tuple[Optional[float], Optional[float]]
+
+
+def normalize_place(city: str) -> str:
+    """Lowercase a place name and strip punctuation and repeated whitespace."""
+    text = _PUNCTUATION.sub(' ', city.lower())
+    parts = (_WHITESPACE.sub(' ', part).strip() for part in text.split(','))
+    return ', '.join(part for part in parts if part)
+
+
+def primary_component(key: str) -> str:
+    """The first component of a normalized place name ("mumbai, india" -> "mumbai")."""
+    return key.split(',', 1)[0]
+
+
+def _components(key: str) -> set:
+    return set(key.split(', '))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Take one token, waiting for it if needed; False if timeout ran out first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class GeocodeCache:
+    """Persistent city -> coordinates cache, including negative entries."""
+
+    def __init__(self, path: str = GEOCODE_CACHE_PATH, ttl: float = GEOCODE_TTL,
+                 negative_ttl: float = GEOCODE_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        return http_cache.thread_connection(self._local, self.path, _SCHEMA)
+
+    def lookup(self, key: str) -> Optional[Coordinates]:
+        """
+        Return cached coordinates for a normalized place, (None, None) for a
+        cached unknown place, or None if nothing usable is cached.
+        """
+        now = time.time()
+        candidates = [key] if primary_component(key) == key else [key, primary_component(key)]
+        for candidate in candidates:
+            row = self._connect().execute(
+                'SELECT lat, lon, stored_at, query FROM geocodes WHERE key = ?', (candidate,)).fetchone()
+            if row is None:
+                continue
+            lat, lon, stored_at, query = row
+            if candidate != key and not _components(key) <= _components(normalize_place(query)):
+                # The qualifier names something the cached place wasn't resolved
+                # from ("portland, maine" vs "Portland, Oregon"); ask Nominatim
+                continue
+            found = lat is not None
+            if now - stored_at >= (self.ttl if found else self.negative_ttl):
+                continue
+            if found or candidate == key:
+                # An unknown primary component says nothing about the full name
+                return lat, lon
+        return None
+
+    def store(self, key: str, query: str, coordinates: Coordinates) -> None:
+        lat, lon = coordinates
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO geocodes (key, query, lat, lon, stored_at) VALUES (?, ?, ?, ?, ?)',
+            (key, query, lat, lon, now))
+        alias = primary_component(key)
+        if lat is not None and alias != key:
+            # Alias the primary component, without overriding a direct lookup of it
+            conn.execute(
+                'INSERT OR IGNORE INTO geocodes (key, query, lat, lon, stored_at) VALUES (?, ?, ?, ?, ?)',
+                (alias, query, lat, lon, now))
+
+    def clear(self) -> None:
+        self._connect().execute('DELETE FROM geocodes')
+
+
+class Geocoder:
+    """Resolve city names to coordinates through the cache and a shared rate limit."""
+
+    def __init__(self, cache: GeocodeCache = None, limiter: TokenBucket = None,
+                 timeout: float = GEOCODE_TIMEOUT, max_wait: float = GEOCODE_MAX_WAIT):
+        self.cache = cache or GeocodeCache()
+        self.limiter = limiter or TokenBucket(GEOCODE_RATE, GEOCODE_BURST)
+        self.timeout = timeout
+        self.max_wait = max_wait
+        self._flight = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'throttled': 0, 'errors': 0}
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def coordinates(self, city: str) -> Coordinates:
+        """Return (lat, lon) for a city, or (None, None) if it can't be resolved."""
+        key = normalize_place(city)
+        if not key:
+            return None, None
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        return self._flight.do(key, lambda: self._resolve(key, city))
+
+    def _cached(self, key: str) -> Optional[Coordinates]:
+        try:
+            cached = self.cache.lookup(key)
+        except sqlite3.Error as e:
+            logger.warning("Geocode cache lookup failed for %s: %s", key, e)
+            return None
+        if cached is not None:
+            self._count('hits' if cached[0] is not None else 'negative_hits')
+        return cached
+
+    def _resolve(self, key: str, city: str) -> Coordinates:
+        # Another caller may have resolved the place while this one waited to lead
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        self._count('misses')
+
+        if not self.limiter.acquire(timeout=self.max_wait):
+            self._count('throttled')
+            logger.warning("Geocoding %s skipped: rate limit wait exceeded %ss", city, self.max_wait)
+            return None, None
+
+        try:
+            with metrics.timed('geocode'):
+                response = http_client.get(
+                    f"{BASE_URLS['nominatim']}/search",
+                    params={'q': city, 'format': 'json', 'limit': 1},
+                    headers={'User-Agent': 'LocalEventFinder/1.0'},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+                data = response.json()
+        except Exception as e:
+            # Transient failures are not cached, so the next search retries
+            self._count('errors')
+            logger.warning("Error getting coordinates for %s: %s", city, e)
+            return None, None
+
+        coordinates = (float(data[0]['lat']), float(data[0]['lon'])) if data else (None, None)
+        try:
+            self.cache.store(key, city, coordinates)
+        except sqlite3.Error as e:
+            logger.warning("Geocode cache store failed for %s: %s", key, e)
+        return coordinates
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder() -> Geocoder:
+    """Return the process-wide geocoder, so every caller shares one rate limit."""
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = Geocoder()
+    return _geocoder
+
+
+def coordinates(city: str) -> Coordinates:
+    return get_geocoder().coordinates(city)
+
+
+def _collect_metrics():
+    if _geocoder is None:
+        return
+    for name, value in _geocoder.stats().items():
+        yield 'eventfinder_geocode_total', 'counter', {'result': name}, value
+
+
+metrics.register_collector(_collect_metrics)
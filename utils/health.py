@@ -0,0 +1,200 @@
+"""
+Per-host health tracking for the event sources.
+
+Each upstream host gets a circuit breaker. After FAILURE_THRESHOLD
+consecutive failures or timeouts the circuit opens and searches skip the
+host instead of waiting on it. Once the cool-down has passed, a single
+half-open probe request is allowed through. If it succeeds the circuit
+closes again; if it fails the circuit reopens with a doubled cool-down.
+
+Latencies of successful requests also feed an adaptive timeout: a host
+that normally answers in 300 ms is given a few multiples of its p95,
+not the full source timeout.
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from utils import metrics
+
+# Consecutive failures that open a circuit
+FAILURE_THRESHOLD = 3
+# Seconds an open circuit waits before a probe, doubled after each failed probe up to the max
+OPEN_SECONDS = 30
+MAX_OPEN_SECONDS = 600
+# Recent successful latencies kept per host for the adaptive timeout
+LATENCY_WINDOW = 50
+MIN_SAMPLES = 5
+# The adaptive timeout is p95 latency times this, clamped to [MIN_TIMEOUT, the caller's default]
+TIMEOUT_MULTIPLIER = 3
+MIN_TIMEOUT = 2.0
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc or url
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class CircuitBreaker:
+    """Health, circuit state and latency samples of one upstream host."""
+
+    def __init__(self, host: str, failure_threshold: int = FAILURE_THRESHOLD,
+                 open_seconds: float = OPEN_SECONDS, max_open_seconds: float = MAX_OPEN_SECONDS):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = open_seconds
+        self.opened_at = None
+        self.last_error = None
+        self.successes = 0
+        self.failures = 0
+        self.skipped = 0
+        self._probing = False
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be sent now. In the half-open state only one
+        probe is let through; its outcome must be reported with
+        record_success, record_failure or release.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    self.skipped += 1
+                    return False
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    self.skipped += 1
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self.successes += 1
+            self._latencies.append(latency)
+            self.consecutive_failures = 0
+            self.state = CLOSED
+            self.cooldown = self.open_seconds
+            self._probing = False
+
+    def record_failure(self, error: str) -> None:
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN:
+                # The probe failed: back off further before the next one
+                self.cooldown = min(self.cooldown * 2, self.max_open_seconds)
+                self._open()
+            elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+            self._probing = False
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give back a probe slot without evidence either way (e.g. a cache hit)."""
+        with self._lock:
+            self._probing = False
+
+    def timeout(self, default: float) -> float:
+        """Per-request timeout derived from recent latency, never above default."""
+        with self._lock:
+            if len(self._latencies) < MIN_SAMPLES:
+                return default
+            p95 = _percentile(list(self._latencies), 0.95)
+        return min(default, max(MIN_TIMEOUT, p95 * TIMEOUT_MULTIPLIER))
+
+    def snapshot(self, default_timeout: float = None) -> Dict:
+        with self._lock:
+            latencies = list(self._latencies)
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+            snapshot = {
+                'host': self.host,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'successes': self.successes,
+                'failures': self.failures,
+                'skipped': self.skipped,
+                'last_error': self.last_error,
+                'retry_in': round(retry_in, 1) if retry_in is not None else None,
+                'latency_p50': round(_percentile(latencies, 0.5), 3) if latencies else None,
+                'latency_p95': round(_percentile(latencies, 0.95), 3) if latencies else None,
+                'samples': len(latencies),
+            }
+        if default_timeout is not None:
+            snapshot['timeout'] = round(self.timeout(default_timeout), 3)
+        return snapshot
+
+
+class HealthRegistry:
+    """Process-wide map of host -> CircuitBreaker."""
+
+    def __init__(self, **breaker_options):
+        self.breaker_options = breaker_options
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = host_of(url)
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host, **self.breaker_options)
+            return breaker
+
+    def snapshot(self, default_timeout: float = None) -> List[Dict]:
+        with self._lock:
+            breakers = sorted(self._breakers.values(), key=lambda breaker: breaker.host)
+        return [breaker.snapshot(default_timeout) for breaker in breakers]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+
+
+registry = HealthRegistry()
+
+
+def breaker(url: str) -> CircuitBreaker:
+    """Return the circuit breaker of the host a URL points at."""
+    return registry.breaker(url)
+
+
+def snapshot(default_timeout: float = None) -> List[Dict]:
+    return registry.snapshot(default_timeout)
+
+
+def _collect_metrics():
+    for host in registry.snapshot():
+        labels = {'host': host['host']}
+        yield 'eventfinder_source_circuit_state', 'gauge', labels, _STATE_VALUES[host['state']]
+        for result in ('successes', 'failures', 'skipped'):
+            yield 'eventfinder_source_requests_total', 'counter', dict(labels, result=result), host[result]
+
+
+metrics.register_collector(_collect_metrics)
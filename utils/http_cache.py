@@ -0,0 +1,244 @@
+"""
+On-disk HTTP response cache for the scraper fetch path.
+
+Responses are stored in SQLite so they survive worker restarts and are shared
+between gunicorn workers. Each entry is served directly while it is younger
+than the caller's TTL; after that it is revalidated with a conditional GET
+(If-None-Match / If-Modified-Since) so an unchanged page costs a 304 instead
+of a full download. The cache is bounded in bytes and evicts the least
+recently used entries first.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+import requests
+from requests.models import PreparedRequest
+from requests.structures import CaseInsensitiveDict
+
+from utils import http_client, metrics
+
+basedir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+
+CACHE_PATH = os.environ.get('SCRAPER_CACHE_PATH', os.path.join(basedir, 'http_cache.db'))
+# Upper bound on the total size of cached bodies, in bytes
+CACHE_MAX_BYTES = int(os.environ.get('SCRAPER_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+
+# Request headers that change the response body and so are part of the key
+VARY_HEADERS = ('Accept', 'Accept-Language')
+# Response headers that describe the wire format, not the stored (decoded) body
+_HOP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    encoding TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at);
+'''
+
+
+def thread_connection(local: threading.local, path: str, schema: str) -> sqlite3.Connection:
+    """
+    This thread's connection to an SQLite file kept in local, opened in
+    autocommit and WAL mode with the schema script applied. Shared by the
+    caches that live in the response cache's file (utils.geocode, utils.cards).
+    """
+    # sqlite3 connections can't be shared between threads, so keep one per thread
+    conn = getattr(local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(schema)
+        local.conn = conn
+    return conn
+
+
+class ResponseCache:
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'evictions': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        return thread_connection(self._local, self.path, _SCHEMA)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the hit/miss/revalidate counters."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    @staticmethod
+    def make_key(url: str, headers: Dict = None) -> str:
+        """Key a request by its full URL plus the headers that affect the body."""
+        headers = CaseInsensitiveDict(headers or {})
+        parts = [url] + [f"{name}:{headers.get(name, '')}" for name in VARY_HEADERS]
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        row = self._connect().execute(
+            'SELECT url, status, headers, encoding, body, etag, last_modified, stored_at '
+            'FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        url, status, headers, encoding, body, etag, last_modified, stored_at = row
+        return {
+            'url': url, 'status': status, 'headers': json.loads(headers), 'encoding': encoding,
+            'body': body, 'etag': etag, 'last_modified': last_modified, 'stored_at': stored_at,
+        }
+
+    def touch(self, key: str, revalidated: bool = False) -> None:
+        """Mark an entry as recently used, and fresh again if it was revalidated."""
+        now = time.time()
+        if revalidated:
+            self._connect().execute(
+                'UPDATE responses SET accessed_at = ?, stored_at = ? WHERE key = ?', (now, now, key))
+        else:
+            self._connect().execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+
+    def store(self, key: str, response: requests.Response) -> None:
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _HOP_HEADERS}
+        body = response.content
+        now = time.time()
+        self._connect().execute(
+            'INSERT OR REPLACE INTO responses '
+            '(key, url, status, headers, encoding, body, size, etag, last_modified, stored_at, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, response.url, response.status_code, json.dumps(headers), response.encoding,
+             body, len(body), response.headers.get('ETag'), response.headers.get('Last-Modified'),
+             now, now))
+        self._count('stores')
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        conn = self._connect()
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM responses ORDER BY accessed_at'):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM responses WHERE key = ?', victims)
+        self._count('evictions', len(victims))
+
+    def clear(self) -> None:
+        self._connect().execute('DELETE FROM responses')
+
+
+def _response_from_entry(entry: Dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response.encoding = entry['encoding']
+    response.url = entry['url']
+    response._content = entry['body']
+    return response
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """Return the process-wide response cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+
+def _collect_metrics():
+    if _cache is None:
+        return
+    for name, value in _cache.stats().items():
+        yield 'eventfinder_http_cache_total', 'counter', {'result': name}, value
+
+
+metrics.register_collector(_collect_metrics)
+
+
+def _touch(cache: ResponseCache, key: str, url: str, revalidated: bool = False) -> None:
+    # The entry is still served if its bookkeeping can't be written
+    try:
+        cache.touch(key, revalidated)
+    except sqlite3.Error as e:
+        logger.warning("Response cache touch failed for %s: %s", url, e)
+
+
+def cached_get(url: str, ttl: float, headers: Dict = None, params: Dict = None,
+               cache: ResponseCache = None, max_bytes: int = None, content_types: Iterable[str] = None,
+               **kwargs) -> requests.Response:
+    """
+    GET a URL through the response cache.
+
+    Entries younger than ttl seconds are returned without touching the
+    network. Older entries are revalidated with a conditional GET, and only
+    200 responses are stored. Downloads go through http_client.get_limited
+    with max_bytes and content_types, so oversized or unwanted responses
+    raise http_client.ResponseRejected and are never stored.
+    """
+    cache = cache or get_cache()
+    prepared = PreparedRequest()
+    prepared.prepare_url(url, params)
+    key = cache.make_key(prepared.url, headers)
+
+    try:
+        entry = cache.lookup(key)
+    except sqlite3.Error as e:
+        logger.warning("Response cache lookup failed for %s: %s", url, e)
+        return http_client.get_limited(url, max_bytes, content_types, headers=headers, params=params, **kwargs)
+
+    if entry is not None and time.time() - entry['stored_at'] < ttl:
+        cache._count('hits')
+        _touch(cache, key, url)
+        return _response_from_entry(entry)
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        if entry['etag']:
+            request_headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            request_headers['If-Modified-Since'] = entry['last_modified']
+
+    response = http_client.get_limited(url, max_bytes, content_types, headers=request_headers, params=params,
+                                       **kwargs)
+    if response.status_code == 304 and entry is not None:
+        cache._count('revalidated')
+        _touch(cache, key, url, revalidated=True)
+        return _response_from_entry(entry)
+
+    cache._count('misses')
+    if response.status_code == 200:
+        try:
+            cache.store(key, response)
+        except sqlite3.Error as e:
+            logger.warning("Response cache store failed for %s: %s", url, e)
+    return response
@@ -0,0 +1,175 @@
+"""
+Shared HTTP transport for all scrapers.
+
+Every outgoing request goes through one urllib3 pool manager, so connections
+to the same host are kept alive and reused across searches instead of paying
+a fresh TCP and TLS handshake each time. requests.Session is not guaranteed
+to be thread-safe, so each thread gets its own lightweight session, but all
+of them are mounted on the same (thread-safe) connection pools.
+
+get_limited streams the body instead of buffering it in one read, and
+gives up as soon as a response turns out to be too large or of a type the
+caller can't use.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterable
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+# Number of distinct hosts to keep connection pools for
+POOL_CONNECTIONS = int(os.environ.get('SCRAPER_POOL_CONNECTIONS', 10))
+# Maximum keep-alive connections kept open per host
+POOL_MAXSIZE = int(os.environ.get('SCRAPER_POOL_MAXSIZE', 20))
+# Default (connect, read) timeout in seconds for requests that don't set one
+DEFAULT_TIMEOUT = (3.05, 10)
+# Largest (decompressed) body get_limited reads, in bytes
+MAX_BODY_BYTES = int(os.environ.get('SCRAPER_MAX_BODY_BYTES', 5 * 1024 * 1024))
+CHUNK_SIZE = 64 * 1024
+
+# ACCEPT_ENCODING advertises br/zstd only when the decoders are installed
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+}
+
+_lock = threading.Lock()
+_local = threading.local()
+_adapter = None
+_generation = 0
+# Optional cap on concurrent requests per host; None means unlimited
+_host_limit = None
+_host_semaphores = {}
+
+
+def _build_adapter(pool_connections: int, pool_maxsize: int) -> HTTPAdapter:
+    # pool_block=False: a burst beyond pool_maxsize opens extra connections
+    # instead of waiting, they just aren't kept alive afterwards.
+    return HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                       max_retries=0, pool_block=False)
+
+
+def configure(pool_connections: int = None, pool_maxsize: int = None) -> None:
+    """Resize the shared connection pools. Existing sessions pick this up on next use."""
+    global _adapter, _generation, POOL_CONNECTIONS, POOL_MAXSIZE
+    with _lock:
+        if pool_connections is not None:
+            POOL_CONNECTIONS = pool_connections
+        if pool_maxsize is not None:
+            POOL_MAXSIZE = pool_maxsize
+        # The old pools are left to be garbage collected rather than closed,
+        # since other threads may still have requests in flight on them.
+        _adapter = _build_adapter(POOL_CONNECTIONS, POOL_MAXSIZE)
+        _generation += 1
+
+
+def _get_adapter() -> HTTPAdapter:
+    global _adapter
+    if _adapter is None:
+        with _lock:
+            if _adapter is None:
+                _adapter = _build_adapter(POOL_CONNECTIONS, POOL_MAXSIZE)
+    return _adapter
+
+
+def get_session() -> requests.Session:
+    """Return this thread's session, mounted on the shared connection pools."""
+    adapter = _get_adapter()
+    session = getattr(_local, 'session', None)
+    if session is None or _local.generation != _generation:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+        _local.generation = _generation
+    return session
+
+
+def set_host_limit(limit: int = None) -> None:
+    """Cap concurrent requests to any single host, e.g. for background crawls."""
+    global _host_limit
+    with _lock:
+        _host_limit = limit
+        _host_semaphores.clear()
+
+
+@contextmanager
+def host_slot(url: str):
+    """Hold one of the host's request slots while the body runs."""
+    if _host_limit is None:
+        yield
+        return
+    host = urlsplit(url).netloc.lower()
+    with _lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = _host_semaphores[host] = threading.BoundedSemaphore(_host_limit)
+    with semaphore:
+        yield
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request through the shared pools, applying the default timeout."""
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    with host_slot(url):
+        return get_session().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Send a GET request through the shared pools."""
+    return request('GET', url, **kwargs)
+
+
+class ResponseRejected(requests.RequestException):
+    """get_limited gave up on a response without reading all of it."""
+
+
+class ResponseTooLarge(ResponseRejected):
+    pass
+
+
+class UnexpectedContentType(ResponseRejected):
+    pass
+
+
+def get_limited(url: str, max_bytes: int = None, content_types: Iterable[str] = None,
+                **kwargs) -> requests.Response:
+    """
+    GET a URL, streaming the body in chunks of at most max_bytes in total.
+
+    A 200 response whose Content-Type isn't one of content_types (if given),
+    or whose Content-Length or streamed body exceeds max_bytes, raises a
+    ResponseRejected subclass as soon as that is known; its connection is
+    closed rather than drained. The response returned has its body already
+    read, like a non-streamed one.
+    """
+    max_bytes = max_bytes or MAX_BODY_BYTES
+    response = get(url, stream=True, **kwargs)
+    try:
+        if response.status_code == 200 and content_types:
+            content_type = response.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+            # A missing type is given the benefit of the doubt
+            if content_type and content_type not in content_types:
+                raise UnexpectedContentType(f"{content_type} response from {url}", response=response)
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > max_bytes:
+            raise ResponseTooLarge(f"{length} byte response from {url} is over {max_bytes}", response=response)
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                # Also catches compressed bodies that inflate past the limit
+                raise ResponseTooLarge(f"Response from {url} is over {max_bytes} bytes", response=response)
+            chunks.append(chunk)
+        response._content = b''.join(chunks)
+        return response
+    finally:
+        # Returns a fully read connection to the pool and drops an abandoned one
+        response.close()
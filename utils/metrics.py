@@ -0,0 +1,96 @@
+"""
+Per-stage timing metrics in the Prometheus text exposition format.
+
+Code wraps each stage of a search in ``timed(stage, source=...)``; the
+durations are kept as cumulative histograms in process memory and rendered
+by the /metrics endpoint. Other modules can register collectors that
+contribute their own counters (cache hit rates and the like).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+STAGE_METRIC = 'eventfinder_stage_seconds'
+
+_lock = threading.Lock()
+# (stage, source) -> [bucket counts..., +Inf count], sum
+_histograms: Dict[Tuple[str, str], list] = {}
+_collectors: List[Callable[[], Iterator[Tuple[str, str, Dict[str, str], float]]]] = []
+
+
+def observe(stage: str, seconds: float, source: str = '') -> None:
+    """Record how long one stage took."""
+    index = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get((stage, source))
+        if histogram is None:
+            histogram = _histograms[(stage, source)] = [[0] * (len(BUCKETS) + 1), 0.0]
+        histogram[0][index] += 1
+        histogram[1] += seconds
+
+
+@contextmanager
+def timed(stage: str, source: str = ''):
+    """Time the body of a with-block as one observation of a stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started, source)
+
+
+def register_collector(collector: Callable[[], Iterator[Tuple[str, str, Dict[str, str], float]]]) -> None:
+    """
+    Add a callable yielding (name, type, labels, value) samples at scrape time.
+
+    type is 'counter' or 'gauge'.
+    """
+    with _lock:
+        _collectors.append(collector)
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def render() -> str:
+    """Render every metric in the Prometheus text format."""
+    with _lock:
+        histograms = {key: ([*counts], total) for key, (counts, total) in _histograms.items()}
+        collectors = list(_collectors)
+
+    lines = [f'# HELP {STAGE_METRIC} Time spent in each stage of a search.',
+             f'# TYPE {STAGE_METRIC} histogram']
+    for (stage, source), (counts, total) in sorted(histograms.items()):
+        labels = {'stage': stage, 'source': source} if source else {'stage': stage}
+        cumulative = 0
+        for bound, count in zip(BUCKETS, counts):
+            cumulative += count
+            lines.append(f'{STAGE_METRIC}_bucket{_labels(dict(labels, le=repr(float(bound))))} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'{STAGE_METRIC}_bucket{_labels(dict(labels, le="+Inf"))} {cumulative}')
+        lines.append(f'{STAGE_METRIC}_sum{_labels(labels)} {total}')
+        lines.append(f'{STAGE_METRIC}_count{_labels(labels)} {cumulative}')
+
+    # Samples of one metric must be contiguous, whichever collector produced them
+    samples: Dict[str, list] = {}
+    kinds = {}
+    for collector in collectors:
+        for name, kind, labels, value in collector():
+            kinds[name] = kind
+            samples.setdefault(name, []).append((labels, value))
+    for name in sorted(samples):
+        lines.append(f'# TYPE {name} {kinds[name]}')
+        lines.extend(f'{name}{_labels(labels)} {value}' for labels, value in samples[name])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,121 @@
+"""
+Optional process pool for the HTML parse stage.
+
+Parsing listing pages with BeautifulSoup is CPU-bound and holds the GIL, so
+when a batch crawl fetches hundreds of pages on threads, parsing piles up
+on one core. With a pool configured, EventScraper ships each page's raw
+bytes to a worker process and gets back compact tuples, which are turned
+into event records in the parent. Workers are told which card hashes the
+parent already has records for (see utils.cards) and send back only the
+hash for those cards.
+
+Submitting blocks once max_pending pages are waiting to be parsed. The
+fetch threads stall instead of buffering an unbounded backlog of page
+bodies in memory, so fetching runs only as fast as parsing can keep up.
+
+The pool is off unless configure() is called (crawler.py --parse-processes)
+or SCRAPER_PARSE_PROCESSES is set; the web app parses in-thread.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional
+
+from utils import cards
+from utils.records import EventRecord
+
+logger = logging.getLogger(__name__)
+
+# Worker processes; 0 disables the pool
+PARSE_PROCESSES = int(os.environ.get('SCRAPER_PARSE_PROCESSES', 0))
+
+
+def _parse_page(name: str, body: bytes, encoding: Optional[str], known: frozenset = frozenset()) -> List:
+    """
+    Worker side: parse one listing page into compact event tuples. Cards
+    whose hash is in known come back as just the hash.
+    """
+    from utils.sources import SOURCES_BY_NAME, extract_events
+
+    placeholders = {digest: EventRecord(card_hash=digest) for digest in known}
+    return [
+        event.card_hash if event.card_hash in known else
+        (event.card_hash, event.title, event.venue, event.url, event.image_url, event.description,
+         event.event_date.toordinal() if event.event_date else None)
+        for event in extract_events(SOURCES_BY_NAME[name], body, placeholders, encoding)
+    ]
+
+
+def _to_event(name: str, record: tuple) -> EventRecord:
+    digest, title, venue, url, image_url, description, ordinal = record
+    event_date = date.fromordinal(ordinal) if ordinal is not None else None
+    return EventRecord(title=title, venue=venue, url=url, image_url=image_url, description=description,
+                       date=event_date.isoformat() if event_date else 'Date not specified',
+                       event_date=event_date, source=name, card_hash=digest)
+
+
+class ParsePool:
+    """A process pool for extract_events with a bound on pages waiting to be parsed."""
+
+    def __init__(self, processes: int = None, max_pending: int = None):
+        self.processes = processes or os.cpu_count() or 1
+        self.max_pending = max_pending or self.processes * 2
+        # forkserver children don't inherit the parent's threads or locks
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else None)
+        self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def parse(self, name: str, body: bytes, encoding: str = None,
+              previous: Dict[str, EventRecord] = None) -> List[EventRecord]:
+        """
+        Parse a source's listing page in a worker; blocks while the pool is
+        saturated. Cards in previous (card hash -> record) reuse a copy of it.
+        """
+        previous = previous or {}
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(_parse_page, name, body, encoding, frozenset(previous))
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        events = [previous[record].copy() if isinstance(record, str) else _to_event(name, record)
+                  for record in future.result()]
+        # The worker's own counts stay in the worker
+        reused = sum(1 for event in events if event.card_hash in previous)
+        cards.count(reused, len(events) - reused)
+        return events
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = None
+_lock = threading.Lock()
+
+
+def configure(processes: int, max_pending: int = None) -> Optional[ParsePool]:
+    """Start (or, with 0 processes, stop) the process-wide parse pool."""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ParsePool(processes, max_pending) if processes > 0 else None
+        if _pool is not None:
+            logger.info("Parsing in %d processes, at most %d pages pending",
+                        _pool.processes, _pool.max_pending)
+        return _pool
+
+
+def get_pool() -> Optional[ParsePool]:
+    """Return the parse pool, or None if pages are parsed in-thread."""
+    global _pool
+    if _pool is None and PARSE_PROCESSES > 0:
+        with _lock:
+            if _pool is None:
+                _pool = ParsePool(PARSE_PROCESSES)
+    return _pool
@@ -0,0 +1,80 @@
+"""
+HTML parser backend selection.
+
+lxml is used when it is installed, since it parses listing pages several
+times faster than the pure-Python html.parser; set SCRAPER_HTML_PARSER to
+force a backend. Scrapers pass a SoupStrainer so that only the event card
+containers are turned into Python objects.
+
+Pages are handed to the parser as bytes along with the encoding found by
+detect_encoding, so bs4 never has to guess one from the whole document.
+"""
+import codecs
+import os
+import re
+from typing import Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+PARSER = os.environ.get('SCRAPER_HTML_PARSER') or ('lxml' if HAVE_LXML else 'html.parser')
+
+# How far into a page to look for a <meta> charset, as browsers do
+META_PRESCAN_BYTES = 1024
+# Assumed when neither the headers nor the page declare an encoding; bs4
+# still falls back to its own detection if the page doesn't decode as it
+DEFAULT_ENCODING = 'utf-8'
+
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+# <meta charset="..."> and <meta http-equiv="Content-Type" content="...; charset=...">
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_BOMS = ((codecs.BOM_UTF8, 'utf-8'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+
+def class_strainer(*classes: str) -> SoupStrainer:
+    """Match tags carrying any of the given CSS classes."""
+    # The class attribute is matched as one string while parsing, so match
+    # individual class tokens with a regex rather than a list of values.
+    pattern = re.compile(r'(?:^|\s)(?:%s)(?:\s|$)' % '|'.join(map(re.escape, classes)))
+    return SoupStrainer(attrs={'class': pattern})
+
+
+def _known(encoding: str) -> Optional[str]:
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return None
+
+
+def detect_encoding(content_type: Optional[str], body: bytes) -> str:
+    """
+    The encoding of an HTML body: a byte order mark, else the Content-Type
+    charset, else a <meta> charset near the start of the page, else
+    DEFAULT_ENCODING. Only the first META_PRESCAN_BYTES are looked at.
+    """
+    for bom, encoding in _BOMS:
+        if body.startswith(bom):
+            return encoding
+    match = _HEADER_CHARSET.search(content_type or '')
+    if match and _known(match.group(1)):
+        return _known(match.group(1))
+    match = _META_CHARSET.search(body[:META_PRESCAN_BYTES])
+    if match and _known(match.group(1).decode('ascii')):
+        return _known(match.group(1).decode('ascii'))
+    return DEFAULT_ENCODING
+
+
+def make_soup(markup, parse_only: SoupStrainer = None, parser: str = None,
+              from_encoding: str = None) -> BeautifulSoup:
+    """
+    Parse markup with the configured backend, optionally restricted by a
+    strainer. Byte markup is decoded as from_encoding, if given.
+    """
+    if from_encoding is not None and isinstance(markup, bytes):
+        return BeautifulSoup(markup, parser or PARSER, parse_only=parse_only, from_encoding=from_encoding)
+    return BeautifulSoup(markup, parser or PARSER, parse_only=parse_only)
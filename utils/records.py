@@ -0,0 +1,130 @@
+"""
+The event record shared by every stage of a search.
+
+Scrapers, the Meetup client, the parse pool and the event store all produce
+EventRecord objects rather than one dict per event. A record keeps its
+fields in __slots__, with no per-instance dict. Venue, city and source
+strings repeat across thousands of events in a batch crawl, so they are
+interned and each distinct value is stored once. Standardization for
+display rewrites a record in place instead of copying it into a new dict.
+
+Records also behave as read-mostly mappings. Code written against event
+dicts (event['title'], event.get('venue'), dict(event)) keeps working, and
+so do Jinja templates, which use attribute access. json.dumps needs
+to_dict(), since a record is not a dict subclass; to_dict() renders
+event_date as an ISO string, so its result serializes as it is.
+"""
+import sys
+from collections.abc import Mapping
+from datetime import date
+from typing import Dict, Optional
+
+from utils.dates import to_date
+
+DATE_NOT_SPECIFIED = 'Date not specified'
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def venue_name(venue) -> str:
+    """The venue as a string; Meetup reports it as a dict with a name."""
+    if isinstance(venue, dict):
+        return venue.get('name') or ''
+    return venue or ''
+
+
+def display_date(event_date: Optional[date]) -> str:
+    return event_date.strftime('%B %d, %Y') if event_date else DATE_NOT_SPECIFIED
+
+
+class EventRecord(Mapping):
+    """
+    One event. 'event_date' is the parsed date, if known; 'date' is its text,
+    YYYY-MM-DD as scraped and "October 20, 2026" once standardized.
+    card_hash identifies the listing card it was extracted from (see
+    utils.cards); it is bookkeeping, not one of the event's fields.
+    """
+
+    FIELDS = ('title', 'venue', 'date', 'event_date', 'url', 'image_url', 'description',
+              'source', 'city')
+    __slots__ = FIELDS + ('card_hash',)
+
+    _FIELD_SET = frozenset(FIELDS)
+    _INTERNED = frozenset({'venue', 'source', 'city'})
+
+    def __init__(self, title: str = '', venue='', date: str = DATE_NOT_SPECIFIED,
+                 event_date: Optional[date] = None, url: str = '#', image_url: Optional[str] = None,
+                 description: Optional[str] = '', source: str = 'unknown', city: Optional[str] = None,
+                 card_hash: Optional[str] = None):
+        self.title = title
+        self.venue = _intern(venue)
+        self.date = date
+        self.event_date = event_date
+        self.url = url
+        self.image_url = image_url
+        self.description = description
+        self.source = _intern(source)
+        self.city = _intern(city)
+        self.card_hash = card_hash
+
+    @classmethod
+    def from_mapping(cls, event: Mapping) -> 'EventRecord':
+        """Build a record from an event dict (or copy another record)."""
+        return cls(**{name: event[name] for name in cls.FIELDS if name in event})
+
+    def copy(self) -> 'EventRecord':
+        record = EventRecord.from_mapping(self)
+        record.card_hash = self.card_hash
+        return record
+
+    def standardize(self) -> 'EventRecord':
+        """
+        Normalize the record for display, in place: strip text, flatten a
+        dict venue to its name, and render the date as "October 20, 2026".
+        Safe to call more than once.
+        """
+        if self.event_date is None:
+            # Records loaded from the store only have the ISO date string
+            self.event_date = to_date(self.date)
+        self.date = display_date(self.event_date)
+        self.title = (self.title or '').strip()
+        self.venue = _intern(venue_name(self.venue).strip())
+        self.description = (self.description if self.description is not None
+                            else 'No description available').strip()
+        return self
+
+    def to_dict(self) -> Dict:
+        """The fields as a JSON-ready dict, with event_date as YYYY-MM-DD (or None)."""
+        fields = {name: getattr(self, name) for name in self.FIELDS}
+        if self.event_date is not None:
+            fields['event_date'] = self.event_date.isoformat()
+        return fields
+
+    def __getitem__(self, key: str):
+        if key not in self._FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in self._FIELD_SET:
+            raise KeyError(key)
+        setattr(self, key, _intern(value) if key in self._INTERNED else value)
+
+    def get(self, key: str, default=None):
+        if key not in self._FIELD_SET:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._FIELD_SET
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def __repr__(self) -> str:
+        return f"EventRecord({self.title!r}, {self.date!r}, source={self.source!r})"
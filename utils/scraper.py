@@ -1,13 +1,81 @@
 import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-from typing import List, Dict
+from datetime import date as date_type, datetime, timezone
+from typing import Callable, List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+import threading
+import time
 import re
 import json
+import logging
+import sqlite3
+
+from utils import cards, geocode, health, http_client, http_cache, metrics, parse_pool
+from utils.cache import ResultCache
+from utils.dates import normalize_date
+from utils.dedupe import dedupe_events
+from utils.parsing import detect_encoding
+from utils.records import EventRecord
+from utils.sources import BASE_URLS, SOURCES, SOURCES_BY_NAME, extract_events, clean_text
+
+# Per-request timeout for a single event source, in seconds
+SOURCE_TIMEOUT = 10
+# Overall deadline for a search across all sources, in seconds
+SEARCH_DEADLINE = 12
+# The same for the background and batch crawlers, whose requests queue behind
+# a per-host limit and which would rather wait than give up on a city
+CRAWL_DEADLINE = 120
+# How long a cached listing page is served without revalidation, per source, in seconds
+SOURCE_CACHE_TTLS = {
+    'insider.in': 600,
+    'bookmyshow': 600,
+    'allevents.in': 900,
+}
+# How long a fetch_events result is served fresh, then stale while refreshing, in seconds
+RESULT_CACHE_TTL = 120
+RESULT_CACHE_STALE_TTL = 600
+# Fresh TTL of a result that skipped a source with an open circuit; about one
+# circuit cool-down (see utils.health), so the source is retried soon after
+RESULT_CACHE_DEGRADED_TTL = 30
+RESULT_CACHE_MAX_ENTRIES = 512
+# Concurrent Meetup group requests per search, and their timeout in seconds
+MEETUP_CONCURRENCY = 8
+MEETUP_TIMEOUT = 10
+# Listing pages fetched per source at most, and how many of them at once
+SOURCE_MAX_PAGES = 5
+PAGE_CONCURRENCY = 3
+# Responses that mean a source is down or blocking us, as opposed to having no page for a city
+UNHEALTHY_STATUSES = {403, 429, 500, 502, 503, 504}
+# Listing page content types worth parsing; pages larger than
+# http_client.MAX_BODY_BYTES (SCRAPER_MAX_BODY_BYTES) aren't downloaded
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+logger = logging.getLogger(__name__)
+
+def _after(events: List[Dict], until: date_type = None) -> bool:
+    """Whether every dated event on a listing page is later than until."""
+    if until is None:
+        return False
+    dates = [event['event_date'] for event in events if event.get('event_date')]
+    return bool(dates) and min(dates) > until
+
+def city_slug(city: str) -> str:
+    """Normalize a city name into the URL slug used by the event sources."""
+    return city.strip().lower().replace(' ', '-')
 
 class EventScraper:
-    def __init__(self):
-        self.base_url = "https://allevents.in"
+    def __init__(self, source_timeout: float = SOURCE_TIMEOUT, deadline: float = SEARCH_DEADLINE,
+                 cache_ttls: Dict[str, float] = None, max_pages: int = SOURCE_MAX_PAGES,
+                 page_concurrency: int = PAGE_CONCURRENCY, card_index: cards.CardIndex = None,
+                 max_page_bytes: int = None):
+        self.base_url = BASE_URLS['allevents.in']
+        self.max_page_bytes = max_page_bytes
+        self.card_index = card_index or cards.get_index()
+        self.source_timeout = source_timeout
+        self.deadline = deadline
+        self.max_pages = max_pages
+        self.page_concurrency = page_concurrency
+        self.cache_ttls = dict(SOURCE_CACHE_TTLS, **(cache_ttls or {}))
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
@@ -15,255 +83,367 @@ class EventScraper:
 
     def clean_text(self, text: str) -> str:
         """Clean text by removing extra whitespace and newlines."""
-        if not text:
-            return ""
-        return re.sub(r'\s+', ' ', text).strip()
+        return clean_text(text)
 
     def parse_date(self, date_text: str) -> str:
         """Parse date text into a standardized format."""
-        if not date_text:
+        return normalize_date(date_text)
+
+    def _sources(self, slug: str) -> List[Tuple]:
+        """Return (name, url, scraper_func) for every event source of a city slug."""
+        return [
+            (spec.name, spec.url_for(slug), partial(self._scrape_source, spec.name))
+            for spec in SOURCES
+        ]
+
+    def _previous_cards(self, url: str) -> Dict[str, EventRecord]:
+        """The cards of a listing's last crawl, or none if the card index can't be read."""
+        try:
+            return self.card_index.previous(url)
+        except sqlite3.Error as e:
+            logger.warning("Card index lookup failed for %s: %s", url, e)
+            return {}
+
+    def _update_cards(self, url: str, events: List[EventRecord], complete: bool,
+                      previous: Dict[str, EventRecord] = None) -> Dict[str, List[EventRecord]]:
+        """Record a listing's cards and return what changed since its last crawl."""
+        try:
+            return self.card_index.update(url, events, complete, previous)
+        except sqlite3.Error as e:
+            logger.warning("Card index update failed for %s: %s", url, e)
+            return cards.diff(previous or {}, events, complete)
+
+    def _fetch_source(self, name: str, url: str, scraper_func, cancelled: threading.Event = None,
+                      until: date_type = None, stopped_early: set = None,
+                      listings: Dict[str, Dict] = None) -> List[Dict]:
+        """
+        Fetch a source's listing pages and scrape their events.
+
+        The first page is fetched on its own. If it has events, later pages
+        are fetched page_concurrency at a time, up to max_pages, until a
+        page is empty or fails. Listings are sorted by date, so when until
+        is given the crawl also stops after the first page whose events are
+        all later than until, and the source is added to stopped_early.
+
+        Cards seen in the listing's last crawl are not extracted again (see
+        utils.cards). listings[url] is set to a dict with the 'previous'
+        cards, whether the crawl was 'complete', i.e. ran past the last
+        page rather than stopping at a failed page or a limit, and whether
+        it 'failed', i.e. a page it wanted could not be fetched.
+
+        The caller must have been let through by the host's circuit breaker
+        for the first page.
+        """
+        listing = {'previous': self._previous_cards(url), 'complete': False, 'failed': False}
+        if listings is not None:
+            listings[url] = listing
+        previous = listing['previous']
+        events = self._fetch_page(name, url, scraper_func, cancelled, previous)
+        spec = SOURCES_BY_NAME.get(name)
+        if not events or spec is None or not spec.page_param:
+            listing['complete'] = events is not None
+            listing['failed'] = events is None
+            return events or []
+
+        breaker = health.breaker(url)
+        page = 2
+        done = _after(events, until)
+        while not done and page <= self.max_pages:
+            if cancelled is not None and cancelled.is_set() or not breaker.allow():
+                listing['failed'] = True
+                break
+            window = range(page, min(page + self.page_concurrency, self.max_pages + 1))
+            with ThreadPoolExecutor(max_workers=len(window)) as pages:
+                results = list(pages.map(
+                    lambda n: self._fetch_next_page(name, spec.page_url(url, n), scraper_func,
+                                                    cancelled, previous),
+                    window))
+            for page_events in results:
+                if not page_events:
+                    # Past the last page, unless the page failed
+                    listing['complete'] = page_events is not None
+                    listing['failed'] = page_events is None
+                    return events
+                events.extend(page_events)
+                if _after(page_events, until):
+                    done = True
+                    break
+            page += len(window)
+        if done and stopped_early is not None:
+            stopped_early.add(name)
+        return events
+
+    def _fetch_next_page(self, name: str, url: str, scraper_func, cancelled: threading.Event = None,
+                         previous: Dict[str, EventRecord] = None) -> Optional[List[Dict]]:
+        try:
+            return self._fetch_page(name, url, scraper_func, cancelled, previous)
+        except Exception as e:
+            logger.warning("Error fetching %s: %s", url, e)
             return None
-        
+
+    def _fetch_page(self, name: str, url: str, scraper_func, cancelled: threading.Event = None,
+                    previous: Dict[str, EventRecord] = None) -> Optional[List[Dict]]:
+        """
+        Fetch a single listing page and scrape its events; an empty list if
+        the listing doesn't exist (404), None if it could not be fetched, or
+        was not HTML or larger than max_page_bytes (default
+        http_client.MAX_BODY_BYTES). The outcome is reported to
+        the host's circuit breaker. Cards in previous (card hash -> record)
+        reuse a copy of the record.
+
+        The page's bytes go straight to the parser, with the encoding taken
+        from the headers or a <meta> tag (see utils.parsing.detect_encoding).
+        """
+        logger.debug("Trying to fetch events from: %s", url)
+        breaker = health.breaker(url)
+        started = time.perf_counter()
         try:
-            # Remove common words and clean the text
-            date_text = date_text.lower()
-            date_text = re.sub(r'from|to|until|starts?|ends?|on', '', date_text)
-            date_text = self.clean_text(date_text)
-            
-            # Try to parse the date in various formats
-            date_patterns = [
-                r'(\d{1,2}(?:st|nd|rd|th)?\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*(?:\s+\d{4})?)',
-                r'(\d{4}-\d{2}-\d{2})',
-                r'(\d{2}/\d{2}/\d{4})',
-                r'(\d{1,2}\s+(?:january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{4})'
-            ]
-            
-            for pattern in date_patterns:
-                match = re.search(pattern, date_text)
-                if match:
-                    date_str = match.group(1)
-                    # Convert to datetime and back to string
-                    for fmt in ['%d %b %Y', '%Y-%m-%d', '%d/%m/%Y', '%d %B %Y']:
-                        try:
-                            date_obj = datetime.strptime(date_str, fmt)
-                            return date_obj.strftime('%Y-%m-%d')
-                        except ValueError:
-                            continue
-            
+            response = http_cache.cached_get(url, ttl=self.cache_ttls.get(name, 0), headers=self.headers,
+                                             timeout=breaker.timeout(self.source_timeout),
+                                             max_bytes=self.max_page_bytes, content_types=HTML_CONTENT_TYPES)
+        except http_client.ResponseRejected as e:
+            # The host answered; the page just isn't one worth parsing
+            breaker.release()
+            logger.warning("Skipping %s: %s", url, e)
             return None
-        except Exception as e:
-            print(f"Error parsing date '{date_text}': {str(e)}")
+        except requests.RequestException as e:
+            breaker.record_failure(type(e).__name__)
+            raise
+        except Exception:
+            # Not the host's fault (e.g. a cache error), but a half-open
+            # probe slot must still be handed back
+            breaker.release()
+            raise
+        # requests can't split DNS/connect from time-to-first-byte; elapsed
+        # covers everything up to the response headers (zero for cache hits).
+        ttfb = response.elapsed.total_seconds()
+        if response.status_code in UNHEALTHY_STATUSES:
+            breaker.record_failure(f"HTTP {response.status_code}")
+        elif ttfb:
+            breaker.record_success(ttfb)
+        else:
+            breaker.release()
+        metrics.observe('ttfb', ttfb, name)
+        metrics.observe('download', max(time.perf_counter() - started - ttfb, 0.0), name)
+        logger.debug("Response status code from %s: %s", url, response.status_code)
+        if response.status_code == 404:
+            # The source has no listing for this city; that's an answer, not a failure
+            return []
+        if response.status_code != 200:
+            logger.warning("Failed to fetch events from %s. Status code: %s", url, response.status_code)
             return None
+        if cancelled is not None and cancelled.is_set():
+            # Another city format already won the race; skip the parse
+            return None
+        encoding = detect_encoding(response.headers.get('Content-Type'), response.content)
+        pool = parse_pool.get_pool()
+        with metrics.timed('parse', name):
+            if pool is not None and name in SOURCES_BY_NAME:
+                # Blocks while the pool is saturated, which throttles fetching too
+                source_events = pool.parse(name, response.content, encoding, previous)
+            else:
+                source_events = scraper_func(response.content, previous, encoding)
+        logger.info("Fetched %d events from %s", len(source_events), url)
+        if source_events and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sample event: %s", json.dumps(source_events[0].to_dict(), indent=2))
+        return source_events
 
-    def search_events(self, city: str) -> List[Dict]:
-        """Search for events in a specific city."""
-        events = []
-        city = city.lower().replace(' ', '-')
+    def search_cities(self, cities: List[str], on_source: Callable[[str, List[Dict]], None] = None,
+                      until: date_type = None) -> Dict:
+        """
+        Race all event sources for several candidate city names.
+
+        Candidates are normalized to URL slugs and deduplicated before any
+        request is made, then every (slug, source) request is sent at once.
+        The first slug to return a non-empty source wins: the other slugs are
+        cancelled and the winner's remaining sources are awaited until the
+        overall deadline. Sources still running at the deadline are abandoned
+        and reported in 'timed_out', so callers can use partial results.
+
+        Sources whose circuit breaker is open are not requested at all and
+        are reported in 'skipped'.
         
-        # Try multiple event sources
-        sources = [
-            (f"https://insider.in/{city}/all-events", self._scrape_insider),  # insider.in
-            (f"https://in.bookmyshow.com/{city}/events", self._scrape_bookmyshow),  # bookmyshow
-            (f"{self.base_url}/{city}/events", self._scrape_allevents),  # allevents.in
-        ]
+        If on_source is given, it is called as on_source(name, events) for
+        each of the winning slug's sources as soon as it has finished, so
+        callers can show results before the whole search is done.
         
-        for url, scraper_func in sources:
-            try:
-                print(f"Trying to fetch events from: {url}")
-                response = requests.get(url, headers=self.headers, timeout=15)
-                print(f"Response status code: {response.status_code}")
-                if response.status_code == 200:
-                    print(f"Response content preview: {response.text[:500]}")
-                    source_events = scraper_func(response.text)
-                    if source_events:
-                        events.extend(source_events)
-                        print(f"Successfully fetched {len(source_events)} events from {url}")
-                        print("Sample event:", json.dumps(source_events[0], indent=2) if source_events else "No events")
-                else:
-                    print(f"Failed to fetch events from {url}. Status code: {response.status_code}")
-            except Exception as e:
-                print(f"Error fetching events from {url}: {str(e)}")
-                continue
-        
-        print(f"Total events found: {len(events)}")
-        return events
+        until is the last date the caller is interested in; sources whose
+        pagination stopped early because of it are listed in 'stopped_early'.
+        Sources that answered but had a listing page fail (an error status,
+        a rejected body, or a later page that errored) are listed in
+        'incomplete'; their events are only part of what the site lists.
 
-    def _scrape_insider(self, html_content: str) -> List[Dict]:
-        """Scrape events from insider.in"""
-        events = []
-        soup = BeautifulSoup(html_content, 'html.parser')
+        The winner's listings are recorded in the card index, and 'changes'
+        holds the events 'added', 'changed' and 'removed' since their last
+        crawl (see utils.cards). Sources that timed out or failed are left
+        out of it, and sources whose pagination stopped before the last
+        page report no removals.
+
+        Returns:
+            Dict with 'city' (winning slug or None), 'events', 'changes',
+            'timed_out', 'failed', 'skipped', 'stopped_early' and
+            'incomplete' (lists of source names)
+        """
+        slugs = list(dict.fromkeys(city_slug(city) for city in cities if city.strip()))
+        if not slugs:
+            return {'city': None, 'events': [], 'changes': cards.empty_diff(), 'timed_out': [],
+                    'failed': [], 'skipped': [], 'stopped_early': [], 'incomplete': []}
         
-        # Find all event cards
-        event_cards = soup.select('div[data-event-id]')
-        print(f"Found {len(event_cards)} event cards on insider.in")
+        cancelled = {slug: threading.Event() for slug in slugs}
+        jobs = []
+        skipped = []
+        for slug in slugs:
+            for name, url, scraper_func in self._sources(slug):
+                if health.breaker(url).allow():
+                    jobs.append((slug, (name, url, scraper_func)))
+                elif name not in skipped:
+                    skipped.append(name)
+        # A half-open host lets a single probe through, so only one slug may get it
+        requested = {name for _, (name, _, _) in jobs}
+        skipped = [name for name in skipped if name not in requested]
+        if skipped:
+            logger.warning("Skipping unhealthy sources: %s", ', '.join(skipped))
+        if not jobs:
+            return {'city': None, 'events': [], 'changes': cards.empty_diff(), 'timed_out': [],
+                    'failed': [], 'skipped': skipped, 'stopped_early': [], 'incomplete': []}
+        stopped_early = set()
+        listings = {}
+        urls = {(slug, name): url for slug, (name, url, _) in jobs}
+        executor = ThreadPoolExecutor(max_workers=len(jobs))
+        futures = {
+            executor.submit(self._fetch_source, name, url, scraper_func, cancelled[slug],
+                            until, stopped_early, listings): (slug, name)
+            for slug, (name, url, scraper_func) in jobs
+        }
+        for future, (slug, (name, url, _)) in zip(futures, jobs):
+            # A request that never runs must still hand back a half-open probe slot
+            future.add_done_callback(lambda f, breaker=health.breaker(url): f.cancelled() and breaker.release())
         
-        for card in event_cards:
-            try:
-                # Extract event details
-                title_elem = card.select_one('h3, h4, .event-title')
-                if not title_elem:
-                    continue
-                
-                title = self.clean_text(title_elem.text)
-                print(f"Processing event: {title}")
-                
-                # Get date
-                date_elem = card.select_one('.date-display, .event-date')
-                date = self.parse_date(date_elem.text) if date_elem else None
-                
-                # Get venue
-                venue_elem = card.select_one('.venue-display, .event-venue')
-                venue = self.clean_text(venue_elem.text) if venue_elem else 'Venue not specified'
-                
-                # Get URL
-                url_elem = card.select_one('a[href]')
-                url = url_elem['href'] if url_elem else '#'
-                if not url.startswith('http'):
-                    url = f"https://insider.in{url}"
-                
-                # Get image
-                img_elem = card.select_one('img[src]')
-                image_url = img_elem['src'] if img_elem else None
-                
-                # Get description
-                desc_elem = card.select_one('.event-description, .description')
-                description = self.clean_text(desc_elem.text) if desc_elem else 'View event details on Insider'
-                
-                event_data = {
-                    'title': title,
-                    'date': date if date else 'Date not specified',
-                    'venue': venue,
-                    'url': url,
-                    'image_url': image_url,
-                    'description': description
-                }
-                
-                print(f"Adding event: {json.dumps(event_data, indent=2)}")
-                events.append(event_data)
-                
-            except Exception as e:
-                print(f"Error processing insider.in event card: {str(e)}")
+        deadline = time.monotonic() + self.deadline
+        winner = None
+        reported = set()
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if winner is not None:
+                self._report(futures, winner, reported, on_source)
                 continue
+            
+            # Prefer the earliest candidate when several finish together
+            finished = {futures[future][0] for future in done
+                        if not future.exception() and future.result()}
+            winner = next((slug for slug in slugs if slug in finished), None)
+            if winner is not None:
+                logger.debug("City format '%s' won the race", winner)
+                for slug in slugs:
+                    if slug != winner:
+                        cancelled[slug].set()
+                for future in pending:
+                    if futures[future][0] != winner:
+                        future.cancel()
+                pending = {future for future in pending if futures[future][0] == winner}
+                self._report(futures, winner, reported, on_source)
+        if pending:
+            # Past the deadline: stop every slug's abandoned sources, the
+            # winner's included, from fetching further pages
+            for event in cancelled.values():
+                event.set()
+        # Don't block on abandoned requests; they finish on their own timeout.
+        executor.shutdown(wait=False, cancel_futures=True)
         
-        return events
-
-    def _scrape_bookmyshow(self, html_content: str) -> List[Dict]:
-        """Scrape events from BookMyShow"""
+        # Collect in source order so results are deterministic
         events = []
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Find all event cards
-        event_cards = soup.select('.event-card, .bwc__sc-1nbn7v6-0')
-        print(f"Found {len(event_cards)} event cards on bookmyshow")
-        
-        for card in event_cards:
+        failed = []
+        timed_out = []
+        incomplete = []
+        changes = []
+        for future, (slug, name) in futures.items():
+            if winner is not None and slug != winner:
+                continue
+            if not future.done():
+                if name not in timed_out:
+                    timed_out.append(name)
+                continue
             try:
-                # Extract event details
-                title_elem = card.select_one('h4, .bwc__sc-1nbn7v6-9')
-                if not title_elem:
-                    continue
-                
-                title = self.clean_text(title_elem.text)
-                print(f"Processing event: {title}")
-                
-                # Get date
-                date_elem = card.select_one('.date-venue time, .bwc__sc-1nbn7v6-13')
-                date = self.parse_date(date_elem.text) if date_elem else None
-                
-                # Get venue
-                venue_elem = card.select_one('.date-venue address, .bwc__sc-1nbn7v6-14')
-                venue = self.clean_text(venue_elem.text) if venue_elem else 'Venue not specified'
-                
-                # Get URL
-                url_elem = card.select_one('a[href]')
-                url = url_elem['href'] if url_elem else '#'
-                if not url.startswith('http'):
-                    url = f"https://in.bookmyshow.com{url}"
-                
-                # Get image
-                img_elem = card.select_one('img[src]')
-                image_url = img_elem['src'] if img_elem else None
-                
-                event_data = {
-                    'title': title,
-                    'date': date if date else 'Date not specified',
-                    'venue': venue,
-                    'url': url,
-                    'image_url': image_url,
-                    'description': 'View event details on BookMyShow'
-                }
-                
-                print(f"Adding event: {json.dumps(event_data, indent=2)}")
-                events.append(event_data)
-                
+                source_events = future.result()
             except Exception as e:
-                print(f"Error processing bookmyshow event card: {str(e)}")
+                logger.warning("Error fetching events from %s: %s", name, e)
+                if name not in failed:
+                    failed.append(name)
                 continue
+            for event in source_events:
+                event['source'] = name
+            events.extend(source_events)
+            if winner is not None and urls[slug, name] in listings:
+                url = urls[slug, name]
+                listing = listings[url]
+                if listing['failed'] and name not in incomplete:
+                    incomplete.append(name)
+                changes.append(self._update_cards(url, source_events, listing['complete'],
+                                                  listing['previous']))
+        changes = cards.merge_diffs(changes)
         
-        return events
+        if timed_out:
+            logger.warning("Sources timed out after %ss: %s", self.deadline, ', '.join(timed_out))
+        
+        logger.info("Total events found: %d (%d added, %d changed, %d removed)", len(events),
+                    *(len(changes[kind]) for kind in ('added', 'changed', 'removed')))
+        if incomplete:
+            logger.warning("Listing pages failed for: %s", ', '.join(incomplete))
+        return {'city': winner, 'events': events, 'changes': changes, 'timed_out': timed_out, 'failed': failed,
+                'skipped': skipped, 'stopped_early': [spec.name for spec in SOURCES if spec.name in stopped_early],
+                'incomplete': incomplete}
+
+    @staticmethod
+    def _report(futures: Dict, winner: str, reported: set, on_source) -> None:
+        """Pass the winner's newly finished sources to on_source, in source order."""
+        if on_source is None:
+            return
+        for future, (slug, name) in futures.items():
+            if slug != winner or future in reported or not future.done() or future.exception():
+                continue
+            reported.add(future)
+            events = future.result()
+            for event in events:
+                event['source'] = name
+            try:
+                on_source(name, events)
+            except Exception:
+                logger.exception("on_source callback failed for %s", name)
+
+    def search_sources(self, city: str) -> Dict:
+        """Search all event sources for a single city concurrently."""
+        return self.search_cities([city])
+
+    def search_events(self, city: str) -> List[Dict]:
+        """Search for events in a specific city."""
+        return self.search_sources(city)['events']
+
+    def _scrape_source(self, name: str, html_content, previous: Dict[str, EventRecord] = None,
+                       encoding: str = None) -> List[Dict]:
+        """Scrape events from a listing page (str, or bytes in encoding) using the source's extraction spec."""
+        return extract_events(SOURCES_BY_NAME[name], html_content, previous, encoding)
+
+    def _scrape_insider(self, html_content: str) -> List[Dict]:
+        """Scrape events from insider.in"""
+        return self._scrape_source('insider.in', html_content)
+
+    def _scrape_bookmyshow(self, html_content: str) -> List[Dict]:
+        """Scrape events from BookMyShow"""
+        return self._scrape_source('bookmyshow', html_content)
 
     def _scrape_allevents(self, html_content: str) -> List[Dict]:
         """Scrape events from allevents.in"""
-        events = []
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Find all event cards
-        event_cards = soup.select('.event-item, .event-card, .event-list-item')
-        print(f"Found {len(event_cards)} event cards on allevents.in")
-        
-        for card in event_cards:
-            try:
-                # Extract event details
-                title_elem = card.select_one('.title, .event-title')
-                if not title_elem:
-                    continue
-                
-                title = self.clean_text(title_elem.text)
-                print(f"Processing event: {title}")
-                
-                # Get date
-                date_elem = card.select_one('.date, .event-date')
-                date = self.parse_date(date_elem.text) if date_elem else None
-                
-                # Get venue
-                venue_elem = card.select_one('.venue, .location')
-                venue = self.clean_text(venue_elem.text) if venue_elem else 'Venue not specified'
-                
-                # Get URL
-                url_elem = card.select_one('a[href]')
-                url = url_elem['href'] if url_elem else '#'
-                if not url.startswith('http'):
-                    url = f"https://allevents.in{url}"
-                
-                # Get image
-                img_elem = card.select_one('img[src]')
-                image_url = img_elem['src'] if img_elem else None
-                
-                # Get description
-                desc_elem = card.select_one('.event-description, .description')
-                description = self.clean_text(desc_elem.text) if desc_elem else 'View event details on AllEvents'
-                
-                event_data = {
-                    'title': title,
-                    'date': date if date else 'Date not specified',
-                    'venue': venue,
-                    'url': url,
-                    'image_url': image_url,
-                    'description': description
-                }
-                
-                print(f"Adding event: {json.dumps(event_data, indent=2)}")
-                events.append(event_data)
-                
-            except Exception as e:
-                print(f"Error processing allevents.in event card: {str(e)}")
-                continue
-        
-        return events
+        return self._scrape_source('allevents.in', html_content)
 
 class MeetupScraper:
-    def __init__(self):
-        self.base_url = "https://api.meetup.com"
+    def __init__(self, concurrency: int = MEETUP_CONCURRENCY, timeout: float = MEETUP_TIMEOUT):
+        self.base_url = BASE_URLS['meetup']
+        self.concurrency = concurrency
+        self.timeout = timeout
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'application/json'
@@ -311,40 +491,61 @@ class MeetupScraper:
         return re.sub(r'\s+', ' ', text).strip()
 
     def get_coordinates(self, city: str) -> tuple:
-        """Get coordinates for a city using OpenStreetMap Nominatim API."""
-        try:
-            response = requests.get(
-                f"https://nominatim.openstreetmap.org/search",
-                params={
-                    'q': city,
-                    'format': 'json',
-                    'limit': 1
-                },
-                headers={'User-Agent': 'LocalEventFinder/1.0'}
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            if data:
-                return float(data[0]['lat']), float(data[0]['lon'])
-            
-            return None, None
-            
-        except Exception as e:
-            print(f"Error getting coordinates for {city}: {str(e)}")
-            return None, None
+        """Get coordinates for a city via the cached, rate-limited Nominatim geocoder."""
+        return geocode.coordinates(city)
+
+    def _fetch_group_events(self, group: Dict) -> List[EventRecord]:
+        """Fetch the upcoming events of one Meetup group."""
+        events_url = f"{self.base_url}/{group['urlname']}/events"
+        response = http_client.get(
+            events_url,
+            headers=self.headers,
+            params={'page': 5},  # Get up to 5 events per group
+            timeout=self.timeout
+        )
+        
+        if response.status_code == 404:
+            return []
+        
+        response.raise_for_status()
+        
+        events = []
+        for event in response.json():
+            venue = event.get('venue') or {}
+            event_date = _meetup_date(event.get('time'))
+            events.append(EventRecord(
+                title=self.clean_text(event.get('name', 'No Title')),
+                description=self.clean_text(event.get('description', 'No Description')),
+                date=event_date.isoformat() if event_date else 'Date not specified',
+                event_date=event_date,
+                venue=venue.get('name', 'Venue not specified'),
+                city=venue.get('city') or group.get('city') or None,
+                url=event.get('link') or '#',
+                image_url=(group.get('group_photo') or {}).get('photo_link'),
+                source='meetup',
+            ))
+        return events
 
     def search_events(self, city: str, limit: int = 50) -> List[Dict]:
         """Search for events in a specific city."""
+        return self.search_events_with_status(city, limit)['events']
+
+    def search_events_with_status(self, city: str, limit: int = 50) -> Dict:
+        """
+        Search for events in a specific city, reporting whether the search
+        was 'complete': False if the city couldn't be geocoded or any Meetup
+        request failed, so callers don't mistake a failure for no events.
+        """
         events = []
-        print(f"Fetching events for: {city}")
+        complete = False
+        logger.info("Fetching Meetup events for: %s", city)
         
         try:
             # Get coordinates for the city
             lat, lon = self.get_coordinates(city)
             if not lat or not lon:
-                print(f"Could not get coordinates for {city}")
-                return events
+                logger.warning("Could not get coordinates for %s", city)
+                return {'events': events, 'complete': False}
             
             # Find groups in the area first
             groups_url = f"{self.base_url}/find/groups"
@@ -357,198 +558,310 @@ class MeetupScraper:
                 'page': limit
             }
             
-            response = requests.get(groups_url, headers=self.headers, params=params)
+            response = http_client.get(groups_url, headers=self.headers, params=params,
+                                       timeout=self.timeout)
             response.raise_for_status()
             
             groups = response.json()
-            print(f"Found {len(groups)} groups")
+            logger.debug("Found %d groups", len(groups))
             
-            # Get events from each group
-            for group in groups:
-                try:
-                    group_urlname = group.get('urlname')
-                    if not group_urlname:
+            # Fetch every group's events concurrently, but consume them in
+            # group order so results are the same as a serial crawl
+            groups = [group for group in groups if group.get('urlname')]
+            executor = ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(groups))))
+            futures = [executor.submit(self._fetch_group_events, group) for group in groups]
+            complete = True
+            try:
+                for group, future in zip(groups, futures):
+                    try:
+                        group_events = future.result()
+                    except requests.exceptions.RequestException as e:
+                        logger.warning("Error fetching events for group %s: %s", group['urlname'], e)
+                        complete = False
                         continue
-                    
-                    events_url = f"{self.base_url}/{group_urlname}/events"
-                    response = requests.get(
-                        events_url,
-                        headers=self.headers,
-                        params={'page': 5}  # Get up to 5 events per group
-                    )
-                    
-                    if response.status_code == 404:
+                    except Exception as e:
+                        logger.warning("Error processing events for group %s: %s", group['urlname'], e)
+                        complete = False
                         continue
                     
-                    response.raise_for_status()
-                    group_events = response.json()
-                    
-                    for event in group_events:
-                        event_info = {
-                            'title': self.clean_text(event.get('name', 'No Title')),
-                            'description': self.clean_text(event.get('description', 'No Description')),
-                            'date': event.get('time'),
-                            'venue': {
-                                'name': event.get('venue', {}).get('name', 'Venue not specified'),
-                                'address': event.get('venue', {}).get('address_1', 'Address not specified'),
-                                'city': event.get('venue', {}).get('city', ''),
-                                'state': event.get('venue', {}).get('state', ''),
-                                'country': event.get('venue', {}).get('country', '')
-                            },
-                            'group': {
-                                'name': group.get('name', ''),
-                                'city': group.get('city', '')
-                            },
-                            'url': event.get('link'),
-                            'image_url': group.get('group_photo', {}).get('photo_link'),
-                            'going': event.get('yes_rsvp_count', 0)
-                        }
-                        
+                    for event_info in group_events:
                         events.append(event_info)
-                        print(f"Found event: {event_info['title']}")
                         
                         # Stop if we've reached the limit
                         if len(events) >= limit:
-                            return events
-                    
-                except requests.exceptions.RequestException as e:
-                    print(f"Error fetching events for group {group_urlname}: {str(e)}")
-                    continue
-                except Exception as e:
-                    print(f"Error processing events for group {group_urlname}: {str(e)}")
-                    continue
+                            return {'events': events, 'complete': complete}
+            finally:
+                # Drop the requests that haven't started; running ones end on their timeout
+                executor.shutdown(wait=False, cancel_futures=True)
             
         except requests.exceptions.RequestException as e:
-            print(f"Error fetching events: {str(e)}")
+            logger.warning("Error fetching Meetup events: %s", e)
+            complete = False
             if hasattr(e, 'response') and e.response is not None:
-                print(f"Response status: {e.response.status_code}")
-                print(f"Response text: {e.response.text[:200]}")
+                logger.debug("Response status: %s, body: %r", e.response.status_code, e.response.content[:200])
         except Exception as e:
-            print(f"Error processing events: {str(e)}")
+            logger.warning("Error processing Meetup events: %s", e)
+            complete = False
         
-        return events
+        return {'events': events, 'complete': complete}
 
-def fetch_events(location: str, date: str = None) -> List[Dict]:
+def fetch_events(location: str, date: str = None, store=None) -> List[Dict]:
     """
     Fetch events for a given location.
     
     Args:
         location: City name to search events in
         date: Date string (optional)
+        store: EventStore to read fresh events from and save scrapes to (optional)
         
     Returns:
         List of events with their details
     """
-    try:
-        print(f"Fetching events for location: {location}, date: {date}")
+    return fetch_events_with_status(location, date, store)['events']
+
+# Results missing a timed-out or failed source are shared with concurrent
+# callers but not cached. Results that skipped an open circuit are cached
+# briefly: the source is known to be down, and searching again won't help
+_result_cache = ResultCache(
+    ttl=RESULT_CACHE_TTL,
+    stale_ttl=RESULT_CACHE_STALE_TTL,
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    should_cache=lambda result: not missing_sources(result),
+    ttl_for=lambda result: RESULT_CACHE_DEGRADED_TTL if result.get('skipped') else RESULT_CACHE_TTL,
+)
+
+def _collect_result_cache_metrics():
+    for name, value in _result_cache.stats().items():
+        if name == 'entries':
+            yield 'eventfinder_result_cache_entries', 'gauge', {}, value
+        else:
+            yield 'eventfinder_result_cache_total', 'counter', {'result': name}, value
+
+metrics.register_collector(_collect_result_cache_metrics)
+
+def fetch_events_with_status(location: str, date: str = None, store=None, on_source=None) -> Dict:
+    """
+    Fetch events for a given location, reporting which sources timed out.
+    
+    Identical searches share one cached result, and concurrent identical
+    searches wait on a single in-flight scrape.
+    
+    Args:
+        location: City name to search events in
+        date: Date string (optional)
+        store: EventStore to read fresh events from and save scrapes to (optional)
+        on_source: Called as on_source(name, raw_events) as each source of
+            a live scrape finishes (optional). Not called for cached results,
+            nor for a caller that waits on another caller's scrape.
         
-        # Initialize event scraper
-        event_scraper = EventScraper()
+    Returns:
+        Dict with 'events' (list of events), 'timed_out' (source names
+        that did not answer before the search deadline), 'failed' and
+        'skipped' (source names that errored or whose circuit was open;
+        'failed' is ['error'] if the search itself raised)
+        and 'match' (see EventIndex.filter: 'exact', 'fallback', 'all' or
+        'none'). Results with timed-out or failed sources are not cached,
+        and results with skipped ones only for RESULT_CACHE_DEGRADED_TTL.
+    """
+    key = (' '.join(location.lower().split()), date or None)
+    return _result_cache.get(key, lambda: _fetch_events_uncached(location, date, store, on_source))
+
+def scrape_location(location: str, on_source: Callable[[str, List[Dict]], None] = None,
+                    until: date_type = None, deadline: float = SEARCH_DEADLINE) -> Dict:
+    """
+    Scrape all event sources for a location, trying several city name formats.
+    
+    on_source and until are passed on to EventScraper.search_cities, and
+    deadline (seconds) bounds the whole search.
+    
+    Returns:
+        Dict as returned by EventScraper.search_cities
+    """
+    event_scraper = EventScraper(deadline=deadline)
+    
+    # Try different city name formats; duplicate slugs are only fetched once
+    city_formats = [
+        location,  # Original format
+        location.lower(),  # Lowercase
+        location.replace(' ', '-').lower(),  # Lowercase with hyphens
+        location.replace(' ', '').lower(),  # Lowercase without spaces
+        location.split(',')[0].strip(),  # First part before comma
+    ]
+    
+    result = event_scraper.search_cities(city_formats, on_source=on_source, until=until)
+    if result['city']:
+        logger.info("Found %d events for city format: %s", len(result['events']), result['city'])
+    return result
+
+def missing_sources(result: Dict) -> List[str]:
+    """
+    Sources a search result is unexpectedly missing: timed out or failed.
+    Sources skipped by an open circuit are not included; they are known to
+    be down, and retrying them right away would only repeat the skip.
+    """
+    return result['timed_out'] + result.get('failed', [])
+
+def answered_sources(result: Dict) -> List[str]:
+    """The sources a search result actually heard from, in source order."""
+    unheard = set(missing_sources(result)) | set(result.get('skipped', []))
+    return [spec.name for spec in SOURCES if spec.name not in unheard]
+
+def _scrape_location(location: str, store=None, on_source=None, until: date_type = None) -> Dict:
+    """
+    Return a location's raw events from the store if fresh, else scrape them.
+    until is the requested date: the store reads just that day's events if
+    it has any, and a scrape stops paginating past it.
+    """
+    if store is not None:
+        stored = store.load(location, until)
+        if stored is not None:
+            logger.info("Loaded %d stored events for %s", len(stored), location)
+            if on_source is not None:
+                on_source('store', stored)
+            return {'events': stored, 'timed_out': [], 'failed': [], 'skipped': []}
+    
+    result = scrape_location(location, on_source=on_source, until=until)
+    
+    # Scrapes missing a timed-out or failed source are not saved, so the next
+    # search retries them. Skipped sources keep their stored rows. One that
+    # stopped paginating early, or had a listing page fail, saves the pages it
+    # fetched but isn't complete: the city stays stale and nothing is deleted,
+    # so the next search refetches the missing pages
+    if store is not None and not missing_sources(result):
+        complete = not result['stopped_early'] and not result['incomplete']
+        try:
+            store.save(location, result['events'], complete=complete,
+                       sources=answered_sources(result))
+        except Exception as e:
+            logger.warning("Error saving events for %s: %s", location, e)
+    _invalidate_changes(location, result['changes'])
+    return result
+
+def _invalidate_changes(location: str, changes: Dict[str, List[EventRecord]]) -> None:
+    """
+    Drop cached searches of a location that a crawl's changes affect: the
+    dates of changed events, the undated search, and date searches that fell
+    back to all events.
+    """
+    if not any(changes.values()):
+        return
+    days = {event.event_date.isoformat() for events in changes.values() for event in events
+            if event.event_date}
+    city = ' '.join(location.lower().split())
+    dropped = _result_cache.invalidate_where(
+        lambda key, result: key[0] == city and (key[1] is None or key[1] in days or result['match'] != 'exact'))
+    if dropped:
+        logger.debug("Invalidated %d cached searches for %s", dropped, city)
+
+def _meetup_date(epoch_ms) -> Optional[date_type]:
+    """Meetup reports event times in epoch milliseconds."""
+    if not epoch_ms:
+        return None
+    try:
+        return datetime.fromtimestamp(epoch_ms / 1000, timezone.utc).date()
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+def meetup_event_record(event) -> EventRecord:
+    """
+    Return a Meetup event as the flat record the other sources produce.
+    MeetupScraper already builds records; older dict-shaped events (epoch
+    millisecond 'date', dict 'venue') are converted.
+    """
+    if isinstance(event, EventRecord):
+        return event
+    event_date = _meetup_date(event.get('date'))
+    venue = event.get('venue') or {}
+    return EventRecord(
+        title=event.get('title', 'No Title'),
+        date=event_date.isoformat() if event_date else 'Date not specified',
+        event_date=event_date,
+        venue=venue.get('name', 'Venue not specified') if isinstance(venue, dict) else venue,
+        url=event.get('url') or '#',
+        image_url=event.get('image_url'),
+        description=event.get('description', ''),
+        source='meetup',
+    )
+
+class EventIndex:
+    """
+    The deduplicated, standardized events of one scrape, indexed by date.
+    
+    Built once per fetch, so re-filtering (for example the fallback when no
+    event matches the requested date) never touches the network again.
+    """
+    
+    def __init__(self, all_events: List[Dict]):
+        self.events = []
+        self.by_date = {}
         
-        # Try different city name formats
-        city_formats = [
-            location,  # Original format
-            location.lower(),  # Lowercase
-            location.replace(' ', '-').lower(),  # Lowercase with hyphens
-            location.replace(' ', '').lower(),  # Lowercase without spaces
-            location.split(',')[0].strip(),  # First part before comma
-        ]
+        # Collapse the same event listed by several sources (see utils.dedupe)
+        for event in dedupe_events(all_events):
+            try:
+                # Records are standardized in place; merged duplicates and
+                # plain dicts are converted once
+                if not isinstance(event, EventRecord):
+                    event = EventRecord.from_mapping(event)
+                event.standardize()
+                
+                # Only add events with valid titles
+                if event.title and event.title.lower() != 'no title':
+                    self.by_date.setdefault(event.event_date, []).append(event)
+                    self.events.append(event)
+            
+            except Exception as e:
+                logger.warning("Error processing event: %s", e)
+                continue
+    
+    def on(self, day) -> List[Dict]:
+        """Return the events on one date."""
+        return self.by_date.get(day, [])
+    
+    def filter(self, target_date=None) -> Tuple[List[Dict], str]:
+        """
+        Return the events for a date, falling back to all events if none match.
         
-        all_events = []
-        for city in city_formats:
-            print(f"Trying city format: {city}")
-            events = event_scraper.search_events(city)
-            if events:
-                all_events.extend(events)
-                print(f"Found {len(events)} events for city format: {city}")
-                break  # Stop if we found events
+        Returns:
+            (events, match) where match is 'exact', 'fallback', 'all' (no date
+            requested) or 'none'
+        """
+        if target_date is None:
+            return self.events, 'all' if self.events else 'none'
+        events = self.on(target_date)
+        if events:
+            return events, 'exact'
+        if self.events:
+            logger.info("No events on %s, falling back to all %d events", target_date, len(self.events))
+            return self.events, 'fallback'
+        return [], 'none'
+
+def _fetch_events_uncached(location: str, date: str = None, store=None, on_source=None) -> Dict:
+    """Scrape, filter and standardize events for a location; see fetch_events_with_status."""
+    try:
+        logger.info("Fetching events for location: %s, date: %s", location, date)
         
         # Parse target date
         target_date = None
         if date:
             try:
                 target_date = datetime.strptime(date, '%Y-%m-%d').date()
-                print(f"Target date: {target_date}")
             except ValueError:
-                print(f"Invalid date format: {date}")
-                return []
-        
-        print(f"Found {len(all_events)} total events before filtering")
-        
-        # Filter and standardize events
-        standardized_events = []
-        seen_events = set()  # To avoid duplicates
-        
-        for event in all_events:
-            try:
-                # Skip if we've seen this event before (based on title and venue)
-                event_key = (event.get('title', '').lower(), event.get('venue', '').lower())
-                if event_key in seen_events:
-                    continue
-                seen_events.add(event_key)
-                
-                # Get and validate the event date
-                event_date_str = event.get('date', '')
-                event_date = None
-                
-                if event_date_str and event_date_str != 'Date not specified':
-                    try:
-                        # Try parsing the date in various formats
-                        date_formats = ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%B %d, %Y', '%d %B %Y']
-                        for fmt in date_formats:
-                            try:
-                                event_date = datetime.strptime(event_date_str, fmt).date()
-                                break
-                            except ValueError:
-                                continue
-                        
-                        if not event_date and event_date_str:
-                            # Try using the parse_date method as a fallback
-                            parsed_date = event_scraper.parse_date(event_date_str)
-                            if parsed_date:
-                                event_date = datetime.strptime(parsed_date, '%Y-%m-%d').date()
-                    
-                    except (ValueError, TypeError) as e:
-                        print(f"Could not parse date '{event_date_str}': {str(e)}")
-                        continue
-                
-                # Skip events that don't match the target date
-                if target_date and (not event_date or event_date != target_date):
-                    continue
-                
-                # Format the event date for display
-                display_date = event_date.strftime('%B %d, %Y') if event_date else 'Date not specified'
-                
-                # Clean and standardize the event data
-                standardized_event = {
-                    'title': event.get('title', 'No Title').strip(),
-                    'description': event.get('description', 'No description available').strip(),
-                    'venue': event.get('venue', 'Location not specified').strip(),
-                    'date': display_date,
-                    'url': event.get('url', '#'),
-                    'image_url': event.get('image_url')
-                }
-                
-                # Only add events with valid titles
-                if standardized_event['title'] and standardized_event['title'].lower() != 'no title':
-                    standardized_events.append(standardized_event)
-                    print(f"Added event: {standardized_event['title']} on {standardized_event['date']}")
-            
-            except Exception as e:
-                print(f"Error processing event: {str(e)}")
-                continue
+                logger.warning("Invalid date format: %s", date)
+                return {'events': [], 'timed_out': [], 'failed': [], 'skipped': [], 'match': 'none'}
         
-        print(f"Found {len(standardized_events)} events after filtering")
+        result = _scrape_location(location, store, on_source, until=target_date)
+        all_events = result['events']
         
-        if not standardized_events:
-            print(f"No events found for {location}" + (f" on {date}" if date else ""))
-            # Try fetching events without date filter if no events found
-            if target_date and len(all_events) > 0:
-                print("Trying to fetch events without date filter...")
-                return fetch_events(location, None)
+        logger.debug("Found %d total events before filtering", len(all_events))
         
-        return standardized_events
+        with metrics.timed('dedupe'):
+            index = EventIndex(all_events)
+        events, match = index.filter(target_date)
+        logger.info("Found %d events after filtering (%s)", len(events), match)
+        return {'events': events, 'timed_out': result['timed_out'], 'failed': result['failed'],
+                'skipped': result['skipped'], 'match': match}
         
     except Exception as e:
-        print(f"Error fetching events: {str(e)}")
-        return []
+        logger.exception("Error fetching events for %s", location)
+        # Reported as a failed search, so the error isn't cached as "no events"
+        return {'events': [], 'timed_out': [], 'failed': ['error'], 'skipped': [], 'match': 'none'}
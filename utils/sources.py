@@ -0,0 +1,192 @@
+"""
+Declarative extraction specs for the HTML event sources.
+
+Each source is described as data: where its listing page lives, which
+elements are event cards and which selectors pick each field out of a card.
+Selectors are compiled once at import, so the per-card loop only runs
+precompiled matchers. Adding a source means adding a SourceSpec to SOURCES.
+"""
+import logging
+import os
+import re
+from typing import List, Mapping, Optional
+
+import soupsieve
+from bs4 import SoupStrainer
+
+from utils import cards, metrics
+from utils.dates import parse_dates
+from utils.parsing import make_soup, class_strainer
+from utils.records import EventRecord
+
+_WHITESPACE = re.compile(r'\s+')
+
+logger = logging.getLogger(__name__)
+
+# Where each upstream lives. SCRAPER_BASE_URLS overrides them, e.g. to point
+# the scrapers at a local stub server:
+#   SCRAPER_BASE_URLS="insider.in=http://127.0.0.1:8000/insider,meetup=..."
+BASE_URLS = {
+    'insider.in': 'https://insider.in',
+    'bookmyshow': 'https://in.bookmyshow.com',
+    'allevents.in': 'https://allevents.in',
+    'meetup': 'https://api.meetup.com',
+    'nominatim': 'https://nominatim.openstreetmap.org',
+}
+BASE_URLS.update(
+    item.split('=', 1) for item in os.environ.get('SCRAPER_BASE_URLS', '').split(',') if '=' in item
+)
+
+
+def clean_text(text: str) -> str:
+    """Clean text by removing extra whitespace and newlines."""
+    if not text:
+        return ""
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+class SourceSpec:
+    """How to find and extract event cards on one source's listing page."""
+
+    def __init__(self, name: str, url_template: str, cards: str, strainer: SoupStrainer,
+                 title: str, date: str, venue: str, url_prefix: str,
+                 default_description: str, description: Optional[str] = None,
+                 link: str = 'a[href]', image: str = 'img[src]', page_param: Optional[str] = 'page'):
+        self.name = name
+        self.url_template = url_template
+        self.page_param = page_param
+        self.strainer = strainer
+        self.url_prefix = url_prefix
+        self.default_description = default_description
+        self.cards = soupsieve.compile(cards)
+        self.title = soupsieve.compile(title)
+        self.date = soupsieve.compile(date)
+        self.venue = soupsieve.compile(venue)
+        self.description = soupsieve.compile(description) if description else None
+        self.link = soupsieve.compile(link)
+        self.image = soupsieve.compile(image)
+
+    def url_for(self, slug: str) -> str:
+        return self.url_template.format(base=BASE_URLS[self.name], city=slug)
+
+    def page_url(self, url: str, page: int) -> str:
+        """The URL of a later listing page, given the first page's URL."""
+        if page == 1 or not self.page_param:
+            return url
+        return f"{url}{'&' if '?' in url else '?'}{self.page_param}={page}"
+
+
+SOURCES = [
+    SourceSpec(
+        name='insider.in',
+        url_template='{base}/{city}/all-events',
+        cards='div[data-event-id]',
+        strainer=SoupStrainer('div', attrs={'data-event-id': True}),
+        title='h3, h4, .event-title',
+        date='.date-display, .event-date',
+        venue='.venue-display, .event-venue',
+        description='.event-description, .description',
+        url_prefix='https://insider.in',
+        default_description='View event details on Insider',
+    ),
+    SourceSpec(
+        name='bookmyshow',
+        url_template='{base}/{city}/events',
+        cards='.event-card, .bwc__sc-1nbn7v6-0',
+        strainer=class_strainer('event-card', 'bwc__sc-1nbn7v6-0'),
+        title='h4, .bwc__sc-1nbn7v6-9',
+        date='.date-venue time, .bwc__sc-1nbn7v6-13',
+        venue='.date-venue address, .bwc__sc-1nbn7v6-14',
+        url_prefix='https://in.bookmyshow.com',
+        default_description='View event details on BookMyShow',
+    ),
+    SourceSpec(
+        name='allevents.in',
+        url_template='{base}/{city}/events',
+        cards='.event-item, .event-card, .event-list-item',
+        strainer=class_strainer('event-item', 'event-card', 'event-list-item'),
+        title='.title, .event-title',
+        date='.date, .event-date',
+        venue='.venue, .location',
+        description='.event-description, .description',
+        url_prefix='https://allevents.in',
+        default_description='View event details on AllEvents',
+    ),
+]
+
+SOURCES_BY_NAME = {spec.name: spec for spec in SOURCES}
+
+
+def extract_events(spec: SourceSpec, html_content, previous: Mapping[str, EventRecord] = None,
+                   encoding: str = None) -> List[EventRecord]:
+    """
+    Extract every event card from a listing page according to its spec.
+    The page may be a str, or bytes in the given encoding (see
+    utils.parsing.detect_encoding).
+
+    Each event carries its date both as 'date' text (YYYY-MM-DD or
+    'Date not specified') and as a parsed 'event_date' date object, and
+    the hash of its card's HTML as card_hash. Cards whose hash is in
+    previous (card hash -> record, see utils.cards) are not extracted
+    again; a copy of the previous record is used instead.
+    """
+    events = []
+    extracted = []
+    date_texts = []
+    soup = make_soup(html_content, parse_only=spec.strainer, from_encoding=encoding)
+    event_cards = spec.cards.select(soup)
+    logger.debug("Found %d event cards on %s", len(event_cards), spec.name)
+
+    for card in event_cards:
+        try:
+            digest = cards.card_hash(card)
+            if previous and digest in previous:
+                events.append(previous[digest].copy())
+                continue
+
+            title_elem = spec.title.select_one(card)
+            if not title_elem:
+                continue
+            title = clean_text(title_elem.text)
+
+            date_elem = spec.date.select_one(card)
+            date_text = date_elem.text if date_elem else None
+
+            venue_elem = spec.venue.select_one(card)
+            venue = clean_text(venue_elem.text) if venue_elem else 'Venue not specified'
+
+            url_elem = spec.link.select_one(card)
+            url = url_elem['href'] if url_elem else '#'
+            if url_elem and not url.startswith('http'):
+                url = f"{spec.url_prefix}{url}"
+
+            img_elem = spec.image.select_one(card)
+            image_url = img_elem['src'] if img_elem else None
+
+            desc_elem = spec.description.select_one(card) if spec.description else None
+            description = clean_text(desc_elem.text) if desc_elem else spec.default_description
+
+            event = EventRecord(
+                title=title,
+                venue=venue,
+                url=url,
+                image_url=image_url,
+                description=description,
+                source=spec.name,
+                card_hash=digest,
+            )
+            date_texts.append(date_text)
+            extracted.append(event)
+            events.append(event)
+        except Exception as e:
+            logger.warning("Error processing %s event card: %s", spec.name, e)
+            continue
+
+    cards.count(len(events) - len(extracted), len(extracted))
+    # Parse the new cards' dates in one pass; repeated strings are parsed once
+    with metrics.timed('date_parse', spec.name):
+        event_dates = parse_dates(date_texts)
+    for event, event_date in zip(extracted, event_dates):
+        event.date = event_date.isoformat() if event_date else 'Date not specified'
+        event.event_date = event_date
+    return events